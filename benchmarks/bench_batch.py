@@ -0,0 +1,54 @@
+"""Sentences per second of "text_to_speech" (one by one) and "text_to_speech_batch".
+
+Usage: python benchmarks/bench_batch.py [--model PATH_TO_PT] [--language English] [--count N]
+
+Without "--model" the stub model is used (see "stub_model.py").
+"""
+import argparse
+import time
+
+from nltk.tokenize import sent_tokenize
+
+from common import SAMPLES, book_samples, load_module
+from stub_model import install_stub
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", help="the Silero '.pt' file, the stub model by default")
+    parser.add_argument("--language", choices=SAMPLES, default="English")
+    parser.add_argument("--count", type=int, default=200, help="the number of sentences")
+    args = parser.parse_args()
+
+    preprocessing = load_module(args.language, "preprocessing")
+    voice_engine = load_module(args.language, "voice_engine")
+
+    sample = book_samples(args.language)[0]
+    text = sample.read_text(encoding="utf-8")
+    sentences = [preprocessing.prepare_sentence(s) for s in sent_tokenize(text)]
+    sentences = [s for s in sentences if preprocessing.check_readable_symbols(s)][:args.count]
+
+    voice_engine.speaker = voice_engine.get_settings()["speaker"][0][9:]
+    if args.model:
+        voice_engine.voice_model = args.model
+    else:
+        install_stub(voice_engine)
+    # Warm up.
+    voice_engine.text_to_speech_batch(sentences[:8])
+
+    start = time.perf_counter()
+    for sentence in sentences:
+        voice_engine.text_to_speech(sentence)
+    single = len(sentences) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    voice_engine.text_to_speech_batch(sentences)
+    batch = len(sentences) / (time.perf_counter() - start)
+
+    print(f"{len(sentences)} sentences of {sample.name}")
+    print(f"  text_to_speech:       {single:8.2f} sentences/sec")
+    print(f"  text_to_speech_batch: {batch:8.2f} sentences/sec ({batch / single:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
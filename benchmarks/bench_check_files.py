@@ -0,0 +1,70 @@
+"""The start-up file check for a library of many books.
+
+Usage: python benchmarks/bench_check_files.py [--books N] [--repeat N]
+
+The library of empty books is made in a temporary folder. The check is measured on the first
+start (the settings files are created), on an unchanged library (the manifest is used) and
+after a book is added (the library is reconciled again).
+"""
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+
+from common import ROOT
+from src.core.library import Library
+from src.utils.check_files import check_files
+
+
+def measure(config, repeat, change=None):
+    times = []
+    for i in range(repeat):
+        if change is not None:
+            change(i)
+        start = time.perf_counter()
+        assert check_files(config)
+        times.append(time.perf_counter() - start)
+
+    return np.median(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--books", type=int, default=5000, help="the number of books")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        work_dir = Path(work_dir)
+        config = SimpleNamespace(
+            config_dir=work_dir / "config",
+            icons_dir=ROOT / "src" / "icons",
+            books_dir=work_dir / "books",
+            nltk_data_dir=ROOT / "src" / "nltk_data",
+            library=Library(work_dir / "config" / "library.sqlite"),
+        )
+        config.books_dir.mkdir()
+        for i in range(args.books):
+            (config.books_dir / f"Book {i}.txt").touch()
+        # The snapshot of a folder changed just now isn't trusted.
+        old = time.time() - 60
+        os.utime(config.books_dir, (old, old))
+
+        print(f"{args.books} books")
+        print(f"  first start: {measure(config, 1):8.2f} ms")
+        print(f"  unchanged:   {measure(config, args.repeat):8.2f} ms")
+
+        def add_book(i):
+            (config.books_dir / f"New book {i}.txt").touch()
+            os.utime(config.books_dir, (old + i + 1, old + i + 1))
+
+        print(f"  book added:  {measure(config, args.repeat, add_book):8.2f} ms")
+        config.library.close()
+
+
+if __name__ == "__main__":
+    main()
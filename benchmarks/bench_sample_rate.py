@@ -0,0 +1,66 @@
+"""The real-time factor of the voice engine at each sample rate, resampling included.
+
+Usage: python benchmarks/bench_sample_rate.py [--models DIR] [--language English] [--count N]
+
+The audio of the lower rates is resampled to 48000 Hz as for the playback. The cost of the
+stub model (see "stub_model.py") doesn't depend on the rate, so without "--models" only
+the resampling overhead is measured.
+"""
+import argparse
+import time
+
+from nltk.tokenize import sent_tokenize
+
+from common import book_samples, languages, load_module
+from stub_model import install_stub
+from src.core.resample import resample
+
+
+OUTPUT_RATE = 48000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--models", help="the folder of the Silero '.pt' files, the stub model by default")
+    parser.add_argument("--language", choices=languages(), default="English")
+    parser.add_argument("--count", type=int, default=50, help="the number of sentences")
+    args = parser.parse_args()
+
+    preprocessing = load_module(args.language, "preprocessing")
+    voice_engine = load_module(args.language, "voice_engine")
+
+    sample = book_samples(args.language)[0]
+    text = sample.read_text(encoding="utf-8")
+    sentences = [preprocessing.prepare_sentence(s) for s in sent_tokenize(text)]
+    sentences = [s for s in sentences if preprocessing.check_readable_symbols(s)][:args.count]
+
+    settings = voice_engine.get_settings()
+    for parameter, values in settings.items():
+        voice_engine.set_settings(parameter, values[0], args.models)
+
+    print(f"{len(sentences)} sentences of {sample.name}")
+    for value in settings["sample_rate"]:
+        voice_engine.set_settings("sample_rate", value, args.models)
+        if args.models is None:
+            install_stub(voice_engine)
+        rate = voice_engine.SAMPLE_RATE
+        # Warm up.
+        resample(voice_engine.text_to_speech(sentences[0]), rate, OUTPUT_RATE)
+
+        synthesis_time = resampling_time = audio_time = 0
+        for sentence in sentences:
+            start = time.perf_counter()
+            audio = voice_engine.text_to_speech(sentence)
+            synthesis_time += time.perf_counter() - start
+
+            start = time.perf_counter()
+            audio = resample(audio, rate, OUTPUT_RATE)
+            resampling_time += time.perf_counter() - start
+            audio_time += len(audio) / OUTPUT_RATE
+
+        print(f"  {rate:5} Hz: RTF {(synthesis_time + resampling_time) / audio_time:.4f}"
+              f" (resampling {resampling_time / audio_time:.5f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""The cold start of the app: the time from the launch to the first voiced sentence.
+
+Usage: python benchmarks/bench_startup.py [--models DIR] [--repeat N] [--output FILE]
+
+Each run is a new Python process, so the imports are cold. A run measures the stages of the
+app start in order:
+- "import": the modules imported before the window is shown (the GUI and the core);
+- "open_book": the book and its preprocessing cache, as on a start with a known book;
+- "load_voice": torch and the model, the app loads them in the background;
+- "first_sentence": the first chunk of the first sentence from the synthesis queue.
+The times are from the process start, "process" is the whole run with the interpreter start.
+The first run builds the book index and is not counted. Without "--models" the stub model is
+used (see "stub_model.py").
+"""
+import time
+
+START = time.perf_counter()
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+
+STAGES = ["import", "open_book", "load_voice", "first_sentence"]
+
+
+def run(models, work_dir):
+    """Measure the stages in this process, return {stage: seconds from the start}."""
+    report = {}
+
+    # The imports of "src/main.py".
+    from common import book_samples
+    import src.gui.main_widget
+    from src.core.book import open_book
+    from src.core.languages import get_language
+    from src.core.prepared_book import PreparedBook
+    from src.core.synthesis import SynthesisQueue
+    report["import"] = time.perf_counter() - START
+
+    language = get_language()
+    sample = book_samples(language.name)[0]
+    book = open_book(sample, work_dir / "book.idx", language.preprocessing)
+    prepared_book = PreparedBook(book, work_dir / "book.prep", language.preprocessing)
+    report["open_book"] = time.perf_counter() - START
+
+    voice_engine = language.voice_engine
+    for parameter, values in voice_engine.get_settings().items():
+        voice_engine.set_settings(parameter, values[0], models)
+    if models is None:
+        from stub_model import install_stub
+        install_stub(voice_engine)
+    voice_engine.load_voice()
+    report["load_voice"] = time.perf_counter() - START
+
+    queue = SynthesisQueue(3, samplerate=48000)
+    queue.set_book(prepared_book, voice_engine)
+    index = next(i for i in range(len(prepared_book)) if prepared_book.is_readable(i))
+    queue.get(index)
+    report["first_sentence"] = time.perf_counter() - START
+
+    queue.close()
+    queue.thread.join()
+    prepared_book.close()
+    book.close()
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--models", help="the folder of the Silero '.pt' files, the stub model by default")
+    parser.add_argument("--repeat", type=int, default=5, help="the number of measured runs")
+    parser.add_argument("--output", help="the JSON report file")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run(args.models, Path(args.child))))
+        return
+
+    command = [sys.executable, __file__]
+    if args.models:
+        command += ["--models", args.models]
+
+    runs = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        for i in range(args.repeat + 1):
+            start = time.perf_counter()
+            output = subprocess.run(
+                command + ["--child", work_dir], capture_output=True, text=True, check=True
+            ).stdout
+            report = json.loads(output.splitlines()[-1])
+            report["process"] = time.perf_counter() - start
+            # The first run builds the book index.
+            if i:
+                runs.append(report)
+
+    report = {
+        "model": args.models or "stub",
+        "runs": len(runs),
+        "median_s": {
+            stage: round(float(np.median([r[stage] for r in runs])), 3)
+            for stage in STAGES + ["process"]
+        },
+    }
+    for stage, value in report["median_s"].items():
+        print(f"{stage:15} {value:6.3f} s")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+        print(f"The report is written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
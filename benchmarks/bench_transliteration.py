@@ -0,0 +1,46 @@
+"""Per-sentence cost of the Russian latin to cyrillic transliteration.
+
+Usage: python benchmarks/bench_transliteration.py
+"""
+import time
+
+from nltk.tokenize import sent_tokenize
+
+from common import SAMPLES_DIR, load_module
+
+# Latin-heavy text: names, abbreviations and code-like words in a Russian sentence.
+LATIN_SENTENCE = ("Компании Microsoft, Google и IBM выпустили SDK, API и CLI для Python, "
+                  "а John Smith (PhD, MIT) написал о ChatGPT, YAML и XML в журнале Nature.")
+
+
+def measure(function, sentences, repeat=3):
+    """Return the best time per sentence in microseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for sentence in sentences:
+            function(sentence)
+        best = min(best, time.perf_counter() - start)
+
+    return best / len(sentences) * 1e6
+
+
+def main():
+    ru = load_module("Russian", "preprocessing")
+
+    for sample in sorted(SAMPLES_DIR.glob("*.txt")):
+        sentences = sent_tokenize(sample.read_text(encoding="utf-8"))
+        if not any(ru.check_readable_symbols(s) for s in sentences[:100]):
+            continue
+
+        print(f"{sample.stem}: {len(sentences)} sentences")
+        print(f"  latin_to_cyrillic: {measure(ru.latin_to_cyrillic, sentences):8.2f} us/sentence")
+        print(f"  prepare_sentence:  {measure(ru.prepare_sentence, sentences):8.2f} us/sentence")
+
+    sentences = [LATIN_SENTENCE] * 1000
+    print("Latin-heavy sentence:")
+    print(f"  latin_to_cyrillic: {measure(ru.latin_to_cyrillic, sentences):8.2f} us/sentence")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""Shared helpers of the benchmarks."""
+import importlib.util
+import sys
+from pathlib import Path
+
+from nltk.data import path
+
+
+ROOT = Path(__file__).resolve().parent.parent
+LANGUAGES_DIR = ROOT / "languages"
+SAMPLES_DIR = ROOT / "book_samples"
+
+path.append(str(ROOT / "src" / "nltk_data"))
+# For the language independent modules of "src.core".
+sys.path.insert(0, str(ROOT))
+
+# The book samples of each language.
+SAMPLES = {
+    "English": ["Alice’s Adventures in Wonderland.txt", "A Room With A View.txt"],
+    "Russian": ["Алиса в стране чудес.txt", "Комната с видом.txt"],
+}
+
+
+def load_module(language, name):
+    """Load "preprocessing" or "voice_engine" of the language from the "languages" folder."""
+    spec = importlib.util.spec_from_file_location(
+        f"{language}_{name}",
+        LANGUAGES_DIR / language / f"{name}.py"
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    return module
+
+
+def languages():
+    return sorted(d.name for d in LANGUAGES_DIR.iterdir() if d.name in SAMPLES)
+
+
+def book_samples(language):
+    """Return the sample books of the language, the first one is the shortest."""
+    return [SAMPLES_DIR / name for name in SAMPLES[language]]
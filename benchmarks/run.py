@@ -0,0 +1,145 @@
+"""The benchmark suite: preprocessing cost and the real-time factor of the voice engine.
+
+Usage: python benchmarks/run.py [--models DIR] [--language English] [--count N] [--output FILE]
+
+For each language of the "languages" folder and its book samples it measures:
+- "prepare_book": the time to split the whole book into sentences;
+- "prepare_sentence": the time per sentence (mean and percentiles);
+- "text_to_speech": the real-time factor (synthesis time / audio duration, < 1 is faster
+  than real time) and the latency percentiles of a sentence.
+
+Without "--models" the stub model is used (see "stub_model.py"), so the voice engine numbers
+only track the overhead around the model. The report is written as JSON for the comparison
+between runs.
+"""
+import argparse
+import json
+import os
+import platform
+import time
+from datetime import datetime
+
+import numpy as np
+import torch
+
+from common import book_samples, languages, load_module
+from stub_model import install_stub
+
+
+def percentiles(values, scale=1):
+    values = np.asarray(values) * scale
+
+    return {
+        "mean": round(float(values.mean()), 3),
+        "p50": round(float(np.percentile(values, 50)), 3),
+        "p90": round(float(np.percentile(values, 90)), 3),
+        "p99": round(float(np.percentile(values, 99)), 3),
+    }
+
+
+def bench_preprocessing(preprocessing, sample):
+    text = sample.read_text(encoding="utf-8")
+
+    start = time.perf_counter()
+    sentences = preprocessing.prepare_book(text)
+    prepare_book_time = time.perf_counter() - start
+
+    times = []
+    prepared = []
+    for sentence in sentences:
+        start = time.perf_counter()
+        sentence = preprocessing.prepare_sentence(sentence)
+        times.append(time.perf_counter() - start)
+        prepared.append(sentence)
+
+    readable = [s for s in prepared if preprocessing.check_readable_symbols(s)]
+    report = {
+        "characters": len(text),
+        "sentences": len(sentences),
+        "prepare_book_s": round(prepare_book_time, 3),
+        "prepare_sentence_us": percentiles(times, 1e6),
+    }
+
+    return report, readable
+
+
+def bench_voice_engine(voice_engine, sentences):
+    # Warm up: the model loading and the first call are not counted.
+    voice_engine.text_to_speech(sentences[0])
+
+    latencies = []
+    audio_time = 0
+    for sentence in sentences:
+        start = time.perf_counter()
+        audio = voice_engine.text_to_speech(sentence)
+        latencies.append(time.perf_counter() - start)
+        audio_time += len(audio) / voice_engine.SAMPLE_RATE
+
+    synthesis_time = sum(latencies)
+
+    return {
+        "sentences": len(sentences),
+        "audio_s": round(audio_time, 3),
+        "synthesis_s": round(synthesis_time, 3),
+        "real_time_factor": round(synthesis_time / audio_time, 4),
+        "sentences_per_sec": round(len(sentences) / synthesis_time, 2),
+        "latency_ms": percentiles(latencies, 1e3),
+    }
+
+
+def bench_language(language, models, count):
+    preprocessing = load_module(language, "preprocessing")
+    voice_engine = load_module(language, "voice_engine")
+
+    # The first value of each setting, as on the first start of the app.
+    for parameter, values in voice_engine.get_settings().items():
+        voice_engine.set_settings(parameter, values[0], models)
+    if models is None:
+        install_stub(voice_engine)
+
+    report = {"voice": {p: v[0] for p, v in voice_engine.get_settings().items()}, "books": {}}
+    for sample in book_samples(language):
+        print(f"{language}: {sample.stem}")
+        book_report, sentences = bench_preprocessing(preprocessing, sample)
+        book_report["text_to_speech"] = bench_voice_engine(voice_engine, sentences[:count])
+        report["books"][sample.stem] = book_report
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--models", help="the folder of the Silero '.pt' files, the stub model by default")
+    parser.add_argument("--language", choices=languages(), action="append",
+                        help="the language to benchmark, all of them by default")
+    parser.add_argument("--count", type=int, default=100,
+                        help="the number of sentences voiced per book")
+    parser.add_argument("--output", default="benchmark.json", help="the JSON report file")
+    args = parser.parse_args()
+
+    report = {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "torch": torch.__version__,
+        "cpu_count": os.cpu_count(),
+        "model": args.models or "stub",
+        "languages": {},
+    }
+    for language in args.language or languages():
+        report["languages"][language] = bench_language(language, args.models, args.count)
+
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(report, file, ensure_ascii=False, indent=2)
+
+    for language, language_report in report["languages"].items():
+        for book, book_report in language_report["books"].items():
+            tts = book_report["text_to_speech"]
+            print(f"{language:8} {book[:36]:36} prepare_book {book_report['prepare_book_s']:6.2f} s"
+                  f"  prepare_sentence p50 {book_report['prepare_sentence_us']['p50']:7.1f} us"
+                  f"  RTF {tts['real_time_factor']:.4f}"
+                  f"  latency p90 {tts['latency_ms']['p90']:7.1f} ms")
+    print(f"The report is written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
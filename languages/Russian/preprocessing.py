@@ -8,6 +8,7 @@ Russian version.
 """
 import re
 import os
+from functools import lru_cache
 from nltk.tokenize import sent_tokenize
 from num2words import num2words
 
@@ -15,92 +16,61 @@ from num2words import num2words
 __all__ = ["prepare_book", "prepare_sentence", "check_readable_symbols"]
 
 
+# The names of single latin letters.
+SINGLE_LETTERS = {
+    "a": "эй", "b": "би", "c": "си", "d": "ди", "e": "и", "f": "эф", "g": "джи",
+    "h": "эйч", "i": "ай", "j": "джей", "k": "кей", "l": "эл", "m": "эм", "n": "эн",
+    "o": "оу", "p": "пи", "q": "кью", "r": "ар", "s": "эс", "t": "ти", "u": "ю",
+    "v": "ви", "w": "даблйу", "x": "икс", "y": "уаай", "z": "зэд",
+}
+
+# The sounds of latin letters in words, the digraphs are matched before single letters.
+COMBINED_LETTERS = {
+    "ph": "ф", "ya": "я", "zh": "ж", "sh": "ш", "ch": "ч",
+    "a": "а", "b": "б", "c": "к", "d": "д", "e": "и", "f": "ф", "g": "дж",
+    "h": "х", "i": "и", "j": "дж", "k": "к", "l": "л", "m": "м", "n": "н",
+    "o": "о", "p": "п", "q": "к", "r": "р", "s": "с", "t": "т", "u": "ю",
+    "v": "в", "w": "в", "x": "кс", "y": "у", "z": "з",
+}
+
+LATIN_WORD_PATTERN = re.compile("[a-zA-Z]+")
+COMBINED_PATTERN = re.compile("ph|ya|zh|sh|ch|[a-z]")
+
+
 def single_latin_to_cyrillic(text):
-    text = re.sub("[Aa]", "эй", text)
-    text = re.sub("[Bb]", "би", text)
-    text = re.sub("[Cc]", "си", text)
-    text = re.sub("[Dd]", "ди", text)
-    text = re.sub("[Ee]", "и", text)
-    text = re.sub("[Ff]", "эф", text)
-    text = re.sub("[Gg]", "джи", text)
-    text = re.sub("[Hh]", "эйч", text)
-    text = re.sub("[Ii]", "ай", text)
-    text = re.sub("[Jj]", "джей", text)
-    text = re.sub("[Kk]", "кей", text)
-    text = re.sub("[Ll]", "эл", text)
-    text = re.sub("[Mm]", "эм", text)
-    text = re.sub("[Nn]", "эн", text)
-    text = re.sub("[Oo]", "оу", text)
-    text = re.sub("[Pp]", "пи", text)
-    text = re.sub("[Qq]", "кью", text)
-    text = re.sub("[Rr]", "ар", text)
-    text = re.sub("[Ss]", "эс", text)
-    text = re.sub("[Tt]", "ти", text)
-    text = re.sub("[Uu]", "ю", text)
-    text = re.sub("[Vv]", "ви", text)
-    text = re.sub("[Ww]", "даблйу", text)
-    text = re.sub("[Xx]", "икс", text)
-    text = re.sub("[Yy]", "уаай", text)
-    text = re.sub("[Zz]", "зэд", text)
-    
-    return text
+    return SINGLE_LETTERS[text.lower()]
 
 
 def combined_latin_to_cyrillic(text):
-    text = re.sub("PH|Ph|pH|ph", "ф", text)
-    text = re.sub("YA|Ya|yA|ya", "я", text)
-    text = re.sub("ZH|Zh|zH|zh", "ж", text)
-    text = re.sub("SH|Sh|sH|sh", "ш", text)
-    text = re.sub("CH|Ch|cH|ch", "ч", text)
-    
-    text = re.sub("[Aa]", "а", text)
-    text = re.sub("[Bb]", "б", text)
-    text = re.sub("[Cc]", "к", text)
-    text = re.sub("[Dd]", "д", text)
-    text = re.sub("[Ee]", "и", text)
-    text = re.sub("[Ff]", "ф", text)
-    text = re.sub("[Gg]", "дж", text)
-    text = re.sub("[Hh]", "х", text)
-    text = re.sub("[Ii]", "и", text)
-    text = re.sub("[Jj]", "дж", text)
-    text = re.sub("[Kk]", "к", text)
-    text = re.sub("[Ll]", "л", text)
-    text = re.sub("[Mm]", "м", text)
-    text = re.sub("[Nn]", "н", text)
-    text = re.sub("[Oo]", "о", text)
-    text = re.sub("[Pp]", "п", text)
-    text = re.sub("[Qq]", "к", text)
-    text = re.sub("[Rr]", "р", text)
-    text = re.sub("[Ss]", "с", text)
-    text = re.sub("[Tt]", "т", text)
-    text = re.sub("[Uu]", "ю", text)
-    text = re.sub("[Vv]", "в", text)
-    text = re.sub("[Ww]", "в", text)
-    text = re.sub("[Xx]", "кс", text)
-    text = re.sub("[Yy]", "у", text)
-    text = re.sub("[Zz]", "з", text)
-    
-    return text
+    return COMBINED_PATTERN.sub(lambda match: COMBINED_LETTERS[match.group()], text.lower())
+
+
+def replace_latin_word(match):
+    word = match.group()
+    if len(word) == 1:
+        return single_latin_to_cyrillic(word)
+    else:
+        return combined_latin_to_cyrillic(word)
 
 
 def latin_to_cyrillic(text):
-    for match in re.findall("[a-zA-Z]+", text):
-        if len(match) == 1: text = re.sub(match, single_latin_to_cyrillic(match), text, 1)
-        else: text = re.sub(match, combined_latin_to_cyrillic(match), text, 1)
-    
-    return text
+    """Replace every latin word in one pass over the text."""
+    return LATIN_WORD_PATTERN.sub(replace_latin_word, text)
+
+
+NUMBER_PATTERN = re.compile(r"[+-]?\d*[.,]?\d+")
+
+
+@lru_cache(maxsize=4096)
+def number_to_words(number):
+    # "num2words" is a library that converts numbers to words.
+    # It doesn"t work with commas.
+    return num2words(number.replace(",", "."), lang="ru")
 
 
 def numbers_to_words(text):
-    """Find all numeric values and replace them by words."""
-    for match in re.findall(r"[+-]?\d*[.,]?\d+", text):
-        # "num2words" is a library that converts numbers to words.
-        # It doesn"t work with commas.
-        repl = num2words(re.sub(",", ".", match), lang="ru")
-        # Replace the pattern by the repl: re.sub(pattern, repl, string, count).
-        text = re.sub(match, repl, text, 1)
-    
-    return text
+    """Find all numeric values and replace them by words in one pass."""
+    return NUMBER_PATTERN.sub(lambda match: number_to_words(match.group()), text)
 
 
 def check_readable_symbols(text):
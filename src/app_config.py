@@ -1,40 +1,55 @@
 from pathlib import Path
 from PySide6.QtCore import QSettings
 
+from src.core.library import Library
+
 
 class ThemeConfig:
-    def __init__(self, theme, dark="#333333", light="#f5f5f5"):
+    def __init__(self, theme, dark="#333333", light="#f5f5f5",
+                 dark_highlight="#4d4d4d", light_highlight="#dcdcdc",
+                 dark_word_highlight="#6e6e6e", light_word_highlight="#b8b8b8"):
         self.theme = theme
         self.dark = dark
         self.light = light
+        # The background of the current sentence.
+        self.dark_highlight = dark_highlight
+        self.light_highlight = light_highlight
+        # The background of the spoken word.
+        self.dark_word_highlight = dark_word_highlight
+        self.light_word_highlight = light_word_highlight
 
 
 class CheckFilesConfig:
-    def __init__(self, config_dir, icons_dir, books_dir, nltk_data_dir, theme_config):
+    def __init__(self, config_dir, icons_dir, books_dir, nltk_data_dir, library, theme_config):
         self.config_dir = config_dir
         self.icons_dir = icons_dir
         self.books_dir = books_dir
         self.nltk_data_dir = nltk_data_dir
+        self.library = library
         self.theme_config = theme_config
 
 
 class MainWindowConfig:
-    def __init__(self, settings, icons_dir, theme_config):
+    def __init__(self, settings, icons_dir, metrics_dir, theme_config):
         self.settings = settings
         self.icons_dir = icons_dir
+        self.metrics_dir = metrics_dir
         self.theme_config = theme_config
 
 
 class ReaderConfig:
-    def __init__(self, settings, books_dir, config_dir):
+    def __init__(self, settings, library, books_dir, config_dir, cache_dir):
         self.settings = settings
+        self.library = library
         self.books_dir = books_dir
         self.config_dir = config_dir
+        self.cache_dir = cache_dir
 
 
 class SettingsWidgetConfig:
-    def __init__(self, settings, config_dir, icons_dir, core_dir, theme_config):
+    def __init__(self, settings, library, config_dir, icons_dir, core_dir, theme_config):
         self.settings = settings
+        self.library = library
         self.config_dir = config_dir
         self.icons_dir = icons_dir
         self.core_dir = core_dir
@@ -52,8 +67,12 @@ class AppConfig:
         self.CONFIG_DIR = self.BASE_DIR / "config"
         self.NLTK_DATA_DIR = self.BASE_DIR / "nltk_data"
         self.CORE_DIR = self.BASE_DIR / "core"
+        self.CACHE_DIR = self.BASE_DIR / "cache"
+        self.METRICS_DIR = self.BASE_DIR / "metrics"
 
         self.SETTINGS = QSettings(str(self.CONFIG_DIR / "settings.ini"), QSettings.IniFormat)
+        # The books with their reading positions and settings.
+        self.LIBRARY = Library(self.CONFIG_DIR / "library.sqlite")
 
         self.theme_config = ThemeConfig(theme=self.SETTINGS.value("theme", "dark"))
 
@@ -63,23 +82,28 @@ class AppConfig:
             icons_dir=self.ICONS_DIR,
             books_dir=self.BOOKS_DIR,
             nltk_data_dir=self.NLTK_DATA_DIR,
+            library=self.LIBRARY,
             theme_config=self.theme_config,
         )
 
         self.main_window = MainWindowConfig(
             settings=self.SETTINGS,
             icons_dir=self.ICONS_DIR,
+            metrics_dir=self.METRICS_DIR,
             theme_config=self.theme_config,
         )
 
         self.reader = ReaderConfig(
             settings=self.SETTINGS,
+            library=self.LIBRARY,
             books_dir=self.BOOKS_DIR,
             config_dir=self.CONFIG_DIR,
+            cache_dir=self.CACHE_DIR,
         )
 
         self.settings_widget = SettingsWidgetConfig(
             settings=self.SETTINGS,
+            library=self.LIBRARY,
             config_dir=self.CONFIG_DIR,
             icons_dir=self.ICONS_DIR,
             core_dir=self.CORE_DIR,
@@ -0,0 +1,99 @@
+"""The persistent cache of the generated audio.
+
+The audio strings are stored on disk as 16-bit PCM, named by the hash of the prepared
+sentence and the voice id (model file, speaker, sample rate), so the same sentence
+is never voiced twice with the same voice.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+__all__ = ["AudioCache"]
+
+
+class AudioCache:
+    """Content-addressed on-disk audio cache with the LRU size cap."""
+    def __init__(self, cache_dir, max_size):
+        self.cache_dir = cache_dir
+        # In bytes.
+        self.max_size = max_size
+        self.lock = threading.Lock()
+
+        # Counters to see the saved inference time.
+        self.hits = 0
+        self.misses = 0
+        self.synthesis_time = 0.0
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # The least recently used files first.
+        files = sorted(self.cache_dir.glob("*.npy"), key=lambda f: f.stat().st_mtime_ns)
+        self.entries = OrderedDict((f.name, f.stat().st_size) for f in files)
+        self.size = sum(self.entries.values())
+
+    @staticmethod
+    def key(sentence, voice_id):
+        return hashlib.sha1(f"{voice_id}\n{sentence}".encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Return the cached audio string or None."""
+        name = key + ".npy"
+        with self.lock:
+            if name not in self.entries:
+                self.misses += 1
+                return None
+
+            try:
+                pcm = np.load(self.cache_dir / name)
+                # Mark the file as recently used, the order survives the app restart.
+                os.utime(self.cache_dir / name)
+            except (OSError, ValueError):
+                self.size -= self.entries.pop(name)
+                self.misses += 1
+                return None
+
+            self.entries.move_to_end(name)
+            self.hits += 1
+
+        return pcm.astype(np.float32) / 32767
+
+    def put(self, key, audio, synthesis_time=0.0):
+        """Store the audio string, "synthesis_time" is the time spent on voicing it."""
+        pcm = (np.clip(np.asarray(audio, dtype=np.float32), -1, 1) * 32767).astype(np.int16)
+        name = key + ".npy"
+        path = self.cache_dir / name
+
+        with self.lock:
+            self.synthesis_time += synthesis_time
+
+            # Write to a temporary file first, so a crash never leaves a broken entry.
+            temp = path.with_suffix(".tmp")
+            with temp.open("wb") as file:
+                np.save(file, pcm)
+            os.replace(temp, path)
+
+            if name in self.entries:
+                self.size -= self.entries.pop(name)
+            self.entries[name] = path.stat().st_size
+            self.size += self.entries[name]
+
+            # Remove the least recently used files.
+            while self.size > self.max_size and len(self.entries) > 1:
+                old_name, old_size = self.entries.popitem(last=False)
+                (self.cache_dir / old_name).unlink(missing_ok=True)
+                self.size -= old_size
+
+    def stats(self):
+        """Return the hit/miss counters and the estimated inference time saved by hits."""
+        with self.lock:
+            average = self.synthesis_time / self.misses if self.misses else 0.0
+
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": self.size,
+                "saved_time": self.hits * average,
+            }
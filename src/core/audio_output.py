@@ -0,0 +1,123 @@
+"""The audio output.
+
+The sounddevice stream pulls the audio from a ring buffer in its callback. The stream keeps
+running across sentences, so the next sentence is written right after the previous one
+without restarting the device: no gaps and clicks between sentences.
+"""
+import threading
+
+import numpy as np
+import sounddevice as sd
+
+
+__all__ = ["AudioOutput"]
+
+
+class AudioOutput:
+    """The callback stream fed from a ring buffer.
+
+    The positions are counted in samples from the stream opening: "written" is the number
+    of samples written to the buffer, "played" is the number of samples sent to the device.
+    """
+    def __init__(self, samplerate=48000, blocksize=512, latency="low", buffer_time=0.5):
+        self.samplerate = samplerate
+        self.buffer = np.zeros(int(samplerate * buffer_time), dtype=np.float32)
+        self.written = 0
+        self.played = 0
+        self.paused = False
+        self.running = False
+        # The number of times the device asked for data faster than it was produced.
+        self.underruns = 0
+
+        self.condition = threading.Condition()
+        self.stream = sd.OutputStream(
+            samplerate=samplerate,
+            channels=1,
+            dtype="float32",
+            blocksize=blocksize,
+            latency=latency,
+            callback=self._callback
+        )
+
+    def start(self):
+        with self.condition:
+            self.paused = False
+            if not self.running:
+                self.stream.start()
+                self.running = True
+
+    def stop(self):
+        """Stop the device when the buffered audio is played (e.g. the end of the book)."""
+        with self.condition:
+            self.condition.wait_for(
+                lambda: not self.running or self.paused or self.played >= self.written
+            )
+        self.clear()
+        with self.condition:
+            if self.running:
+                # The device plays its own buffers before it stops.
+                self.stream.stop()
+                self.running = False
+
+    def close(self):
+        """Stop the device at once, the unplayed audio is dropped."""
+        self.clear()
+        self.stop()
+        self.stream.close()
+
+    def pause(self):
+        """Silence the output at once, the buffered audio stays until "clear"."""
+        with self.condition:
+            self.paused = True
+            self.condition.notify_all()
+
+    def clear(self):
+        """Drop the unplayed audio (for pause, seek and the next/previous sentence)."""
+        with self.condition:
+            self.written = self.played
+            self.condition.notify_all()
+
+    def write(self, audio, timeout=None):
+        """Write as much of the audio as fits into the buffer, wait for free space if needed.
+
+        Return the number of written samples (0 if there was no space within the timeout).
+        """
+        with self.condition:
+            if not self.condition.wait_for(
+                lambda: self.written - self.played < len(self.buffer),
+                timeout
+            ):
+                return 0
+
+            size = min(len(audio), len(self.buffer) - (self.written - self.played))
+            start = self.written % len(self.buffer)
+            first = min(size, len(self.buffer) - start)
+            self.buffer[start:start+first] = audio[:first]
+            self.buffer[:size-first] = audio[first:size]
+            self.written += size
+
+            return size
+
+    def wait_played(self, position, timeout=None):
+        """Wait until the stream has played up to the position."""
+        with self.condition:
+            return self.condition.wait_for(lambda: self.played >= position, timeout)
+
+    def _callback(self, outdata, frames, time, status):
+        if status.output_underflow:
+            self.underruns += 1
+
+        with self.condition:
+            if self.paused:
+                outdata.fill(0)
+                return
+
+            size = min(frames, self.written - self.played)
+            start = self.played % len(self.buffer)
+            first = min(size, len(self.buffer) - start)
+            outdata[:first, 0] = self.buffer[start:start+first]
+            outdata[first:size, 0] = self.buffer[:size-first]
+            outdata[size:].fill(0)
+
+            self.played += size
+            self.condition.notify_all()
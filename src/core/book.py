@@ -0,0 +1,200 @@
+"""The book storage.
+
+A book is a memory-mapped UTF-8 text file with an array of sentence offsets, the sentences
+are decoded only when they are accessed, so only the read pages of the file are in memory.
+The sentence boundaries of a book are stored as an array of byte offsets in the
+"config/books/<book>.idx" file, so the text is tokenized only once and not on every start.
+The index is invalidated by the book file size/mtime (and hash) and by the preprocessing
+module (the language) that did the tokenization.
+"""
+import hashlib
+import mmap
+import struct
+from array import array
+from pathlib import Path
+
+from src.core import preprocessing as default_preprocessing
+
+
+__all__ = ["Book", "open_book"]
+
+
+# Magic, book size, book mtime, book hash, preprocessing hash, number of sentences.
+HEADER = struct.Struct("<4sQQ20s20sQ")
+MAGIC = b"VBR1"
+
+_segmenter_ids = {}
+
+
+def segmenter_id(preprocessing=default_preprocessing):
+    """Identify the tokenization, another language gives other sentence boundaries."""
+    if preprocessing.__file__ not in _segmenter_ids:
+        _segmenter_ids[preprocessing.__file__] = hashlib.sha1(
+            Path(preprocessing.__file__).read_bytes()
+        ).digest()
+
+    return _segmenter_ids[preprocessing.__file__]
+
+
+def file_hash(path):
+    digest = hashlib.sha1()
+    with path.open("rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+
+    return digest.digest()
+
+
+def build_index(text, preprocessing=default_preprocessing):
+    """Tokenize the text, return the flat array of byte offsets [start0, end0, start1, ...].
+
+    Return None if the sentences are not the exact slices of the text.
+    """
+    offsets = array("Q")
+
+    char_position = 0
+    byte_position = 0
+    # This "prepare_book" function is from the "preprocessing" module.
+    for sentence in preprocessing.prepare_book(text):
+        start = text.find(sentence, char_position)
+        if start == -1:
+            return None
+
+        byte_position += len(text[char_position:start].encode("utf-8"))
+        offsets.append(byte_position)
+        byte_position += len(sentence.encode("utf-8"))
+        offsets.append(byte_position)
+        char_position = start + len(sentence)
+
+    return offsets
+
+
+def read_index(book_path, index_path, preprocessing=default_preprocessing):
+    """Return the offsets and the book hash from the index file or None if it is stale."""
+    try:
+        with index_path.open("rb") as file:
+            header = HEADER.unpack(file.read(HEADER.size))
+            magic, size, mtime, book_hash, segmenter, count = header
+            if magic != MAGIC or segmenter != segmenter_id(preprocessing):
+                return None
+
+            stat = book_path.stat()
+            if (size, mtime) != (stat.st_size, stat.st_mtime_ns):
+                # The file was touched, but the text may be the same.
+                if size != stat.st_size or book_hash != file_hash(book_path):
+                    return None
+                rewrite = True
+            else:
+                rewrite = False
+
+            offsets = array("Q")
+            offsets.fromfile(file, count * 2)
+    except (OSError, EOFError, struct.error):
+        return None
+
+    if rewrite:
+        write_index(book_path, index_path, offsets, book_hash, preprocessing)
+
+    return offsets, book_hash
+
+
+def write_index(book_path, index_path, offsets, book_hash, preprocessing=default_preprocessing):
+    stat = book_path.stat()
+    header = HEADER.pack(
+        MAGIC,
+        stat.st_size,
+        stat.st_mtime_ns,
+        book_hash,
+        segmenter_id(preprocessing),
+        len(offsets) // 2
+    )
+
+    temp = index_path.with_name(index_path.name + ".tmp")
+    with temp.open("wb") as file:
+        file.write(header)
+        offsets.tofile(file)
+    temp.replace(index_path)
+
+
+class Book:
+    """The sequence of sentences: supports "len()", indexing, slicing and iteration.
+
+    "identity" is the hash of the text and the preprocessing module, the data derived from
+    the book (e.g. the prepared sentences) is valid while it is the same. It is None for
+    books built in memory.
+    """
+    def __init__(self, data, offsets, file=None, identity=None):
+        # "data" is a mmap of the book file or bytes.
+        self.data = data
+        self.offsets = offsets
+        self.file = file
+        self.identity = identity
+
+    @classmethod
+    def from_sentences(cls, sentences):
+        """Build the book in memory from a list of sentences."""
+        data = bytearray()
+        offsets = array("Q")
+        for sentence in sentences:
+            offsets.append(len(data))
+            data += sentence.encode("utf-8")
+            offsets.append(len(data))
+
+        return cls(bytes(data), offsets)
+
+    def __len__(self):
+        return len(self.offsets) // 2
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("sentence index out of range")
+
+        sentence = self.data[self.offsets[2*index]:self.offsets[2*index + 1]].decode("utf-8")
+        if "\r" in sentence:
+            sentence = sentence.replace("\r\n", "\n").replace("\r", "\n")
+
+        return sentence
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def close(self):
+        if self.file is not None:
+            self.data.close()
+            self.file.close()
+            self.file = None
+
+
+def open_book(book_path, index_path, preprocessing=default_preprocessing):
+    """Open the book, tokenize it by the language "preprocessing" only if the index is stale."""
+    index = read_index(book_path, index_path, preprocessing)
+
+    if index is None:
+        # Keep the "\r\n" line ends, so the offsets match the file bytes.
+        with book_path.open(encoding="utf-8", newline="") as file:
+            text = file.read()
+
+        offsets = build_index(text, preprocessing)
+        if offsets is None:
+            # This "prepare_book" function is from the "preprocessing" module.
+            return Book.from_sentences(preprocessing.prepare_book(text))
+
+        book_hash = file_hash(book_path)
+        write_index(book_path, index_path, offsets, book_hash, preprocessing)
+    else:
+        offsets, book_hash = index
+
+    identity = book_hash + segmenter_id(preprocessing)
+    if not offsets:
+        # An empty file can't be memory-mapped.
+        return Book(b"", offsets, identity=identity)
+
+    file = book_path.open("rb")
+
+    return Book(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ), offsets, file, identity)
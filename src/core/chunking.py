@@ -0,0 +1,42 @@
+"""The splitting of long sentences into chunks for the voice engine.
+
+A long sentence is voiced by chunks, so the playback starts when the first chunk is ready
+instead of waiting for the whole sentence.
+"""
+import re
+
+
+__all__ = ["split_sentence"]
+
+
+# The clause boundary: the space after a comma, semicolon, colon, dash or bracket.
+CLAUSE_PATTERN = re.compile(r"(?<=[,;:—–)])\s+")
+
+
+def split_sentence(sentence, budget):
+    """Split the sentence at clause boundaries into chunks of up to "budget" characters.
+
+    A clause longer than the budget is split at spaces. "budget" <= 0 turns the splitting off.
+    """
+    if budget <= 0 or len(sentence) <= budget:
+        return [sentence]
+
+    pieces = []
+    for clause in CLAUSE_PATTERN.split(sentence):
+        if len(clause) <= budget:
+            pieces.append(clause)
+        else:
+            pieces.extend(clause.split())
+
+    chunks = []
+    chunk = ""
+    for piece in pieces:
+        if chunk and len(chunk) + 1 + len(piece) > budget:
+            chunks.append(chunk)
+            chunk = piece
+        else:
+            chunk = chunk + " " + piece if chunk else piece
+    if chunk:
+        chunks.append(chunk)
+
+    return chunks
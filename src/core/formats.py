@@ -0,0 +1,302 @@
+"""The book formats: the text of EPUB, FB2 and HTML books is extracted to a plain text file.
+
+The extractor of a format is a generator of ("chapter", title) and ("text", paragraph) events.
+The files are parsed incrementally: FB2 by the "iterparse" of ElementTree (the parsed
+elements are cleared), EPUB by the zip member stream of each spine document and HTML by
+the file stream, so a big book is never loaded as a whole tree. The paragraphs are written
+to "config/books/<book>.text", which is opened as a ".txt" book, and the byte offsets of the
+chapters to "config/books/<book>.chapters". Both are extracted again when the book file
+changes. A new format is added with "register_format".
+"""
+import io
+import json
+import os
+import posixpath
+import re
+import zipfile
+import xml.etree.ElementTree as ElementTree
+from bisect import bisect_left
+from html.parser import HTMLParser
+from urllib.parse import unquote
+
+
+__all__ = ["book_suffixes", "chapter_sentences", "extract_book", "find_book", "register_format"]
+
+
+# The size of the blocks the text files are parsed by.
+BLOCK_SIZE = 1 << 16
+# The characters a heading can end with, other headings get a period: the sentence
+# tokenizer would join them with the next sentence.
+SENTENCE_ENDS = ".!?…:;"
+# The length of a chapter title taken from its first paragraph.
+TITLE_LENGTH = 60
+CHAPTERS_VERSION = 1
+
+_extractors = {}
+
+
+def register_format(suffix, extractor):
+    """Add the extractor of the book files with the suffix (e.g. ".epub")."""
+    _extractors[suffix] = extractor
+
+
+def book_suffixes():
+    """Return the suffixes of the book files, ".txt" is preferred for the same name."""
+    return (".txt", *_extractors)
+
+
+def find_book(books_dir, name):
+    """Return the path of the book file by the book name, None if there is no such file."""
+    for suffix in book_suffixes():
+        path = books_dir / (name + suffix)
+        if path.exists():
+            return path
+
+    return None
+
+
+def clean(text):
+    return " ".join(text.split())
+
+
+def heading(text):
+    """Return the heading as a sentence."""
+    if text and text[-1] not in SENTENCE_ENDS:
+        text += "."
+
+    return text
+
+
+class TextParser(HTMLParser):
+    """The paragraphs and the headings of an (X)HTML stream, collected to "events"."""
+    BLOCKS = {
+        "p", "div", "li", "dd", "dt", "tr", "blockquote", "pre", "section", "article", "br",
+        "h1", "h2", "h3", "h4", "h5", "h6"
+    }
+    HEADINGS = {"h1", "h2", "h3"}
+    SKIPPED = {"head", "script", "style", "svg"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.events = []
+        self.parts = []
+        self.skipped = 0
+        self.in_heading = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIPPED:
+            self.skipped += 1
+        elif self.in_heading and tag in self.BLOCKS and tag not in self.HEADINGS:
+            # A heading is one title up to its end tag, e.g. "Chapter 1<br/>The Beginning".
+            self.parts.append(" ")
+        elif tag in self.BLOCKS:
+            self.end_block()
+            self.in_heading = tag in self.HEADINGS
+
+    def handle_startendtag(self, tag, attrs):
+        if self.in_heading and tag in self.BLOCKS:
+            self.parts.append(" ")
+        elif tag in self.BLOCKS:
+            self.end_block()
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIPPED:
+            self.skipped = max(self.skipped - 1, 0)
+        elif self.in_heading and tag in self.BLOCKS and tag not in self.HEADINGS:
+            self.parts.append(" ")
+        elif tag in self.BLOCKS:
+            self.end_block()
+            self.in_heading = False
+
+    def handle_data(self, data):
+        if not self.skipped:
+            self.parts.append(data)
+
+    def end_block(self):
+        text = clean("".join(self.parts))
+        self.parts = []
+        if text:
+            self.events.append(("heading" if self.in_heading else "text", text))
+
+    def close(self):
+        super().close()
+        self.end_block()
+
+
+def parse_html(stream):
+    """Generate the ("heading" | "text", text) events of a text stream."""
+    parser = TextParser()
+    for block in iter(lambda: stream.read(BLOCK_SIZE), ""):
+        parser.feed(block)
+        yield from parser.events
+        parser.events = []
+    parser.close()
+    yield from parser.events
+
+
+def html_encoding(path):
+    """Return the charset declared at the beginning of the file, UTF-8 by default."""
+    with open(path, "rb") as file:
+        match = re.search(rb"""charset=["']?([\w-]+)""", file.read(4096))
+
+    return match.group(1).decode("ascii") if match else "utf-8"
+
+
+def extract_html(path):
+    """A chapter begins at each "h1"-"h3" heading."""
+    with open(path, encoding=html_encoding(path), errors="replace") as stream:
+        for kind, text in parse_html(stream):
+            if kind == "heading":
+                yield "chapter", text
+                text = heading(text)
+            yield "text", text
+
+
+def epub_documents(archive):
+    """Return the paths of the EPUB documents in the reading order (the spine)."""
+    container = ElementTree.fromstring(archive.read("META-INF/container.xml"))
+    package = next(e.get("full-path") for e in container.iter() if e.tag.endswith("rootfile"))
+    opf = ElementTree.fromstring(archive.read(package))
+    base = posixpath.dirname(package)
+
+    # The references are URLs: "chapter%201.xhtml" is the "chapter 1.xhtml" file.
+    manifest = {
+        e.get("id"): posixpath.normpath(posixpath.join(base, unquote(e.get("href"))))
+        for e in opf.iter() if e.tag.endswith("}item") or e.tag == "item"
+    }
+
+    return [
+        manifest[e.get("idref")]
+        for e in opf.iter() if (e.tag.endswith("}itemref") or e.tag == "itemref")
+        and e.get("idref") in manifest
+    ]
+
+
+def extract_epub(path):
+    """A chapter is a document of the spine, its title is the first heading."""
+    with zipfile.ZipFile(path) as archive:
+        for document in epub_documents(archive):
+            try:
+                member = archive.open(document)
+            except KeyError:
+                continue
+            with io.TextIOWrapper(member, encoding="utf-8", errors="replace") as stream:
+                # One document (usually a chapter) is kept to find its title.
+                events = list(parse_html(stream))
+            if not events:
+                continue
+
+            kind, text = events[0]
+            yield "chapter", text if kind == "heading" else text[:TITLE_LENGTH]
+            for kind, text in events:
+                yield "text", heading(text) if kind == "heading" else text
+
+
+def local_name(tag):
+    return tag.rsplit("}", 1)[-1]
+
+
+def extract_fb2(path):
+    """A chapter is a "section" with a "title", the notes and comments bodies are skipped."""
+    body = False
+    skipped = False
+    title = None
+    for event, element in ElementTree.iterparse(path, events=("start", "end")):
+        tag = local_name(element.tag)
+        if event == "start":
+            if tag == "body":
+                body = True
+                skipped = element.get("name") in ("notes", "comments")
+            elif tag == "title" and body and not skipped:
+                title = []
+            continue
+
+        if tag == "body":
+            body = False
+            element.clear()
+        elif not body or skipped:
+            # The description and the images (the "binary" elements).
+            if tag in ("binary", "section", "p"):
+                element.clear()
+        elif tag in ("p", "v", "subtitle", "text-author"):
+            text = clean("".join(element.itertext()))
+            element.clear()
+            if not text:
+                continue
+            if title is not None:
+                title.append(text)
+            else:
+                yield "text", text
+        elif tag == "title" and title is not None:
+            text = " ".join(title)
+            title = None
+            if text:
+                yield "chapter", text
+                yield "text", heading(text)
+        elif tag in ("section", "stanza", "poem", "cite", "epigraph"):
+            element.clear()
+
+
+register_format(".epub", extract_epub)
+register_format(".fb2", extract_fb2)
+register_format(".html", extract_html)
+register_format(".htm", extract_html)
+
+
+def extract_book(path, books_config_dir):
+    """Return the path of the text of the book and the chapters [(title, byte offset)].
+
+    A ".txt" book is its own text without chapters. The text of other formats is extracted
+    once and cached while the book file is the same.
+    """
+    extractor = _extractors.get(path.suffix.lower())
+    if extractor is None:
+        return path, []
+
+    text_path = books_config_dir / (path.stem + ".text")
+    chapters_path = books_config_dir / (path.stem + ".chapters")
+    stat = path.stat()
+    source = [CHAPTERS_VERSION, stat.st_size, stat.st_mtime_ns]
+    try:
+        with open(chapters_path, encoding="utf-8") as file:
+            cached = json.load(file)
+        if cached["source"] == source and text_path.exists():
+            return text_path, [tuple(chapter) for chapter in cached["chapters"]]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    chapters = []
+    position = 0
+    title = None
+    temp = text_path.with_name(text_path.name + ".part")
+    with open(temp, "w", encoding="utf-8", newline="") as file:
+        for kind, text in extractor(path):
+            if kind == "chapter":
+                title = text
+                continue
+            if title is not None:
+                chapters.append((title, position))
+                title = None
+
+            text += "\n\n"
+            file.write(text)
+            position += len(text.encode("utf-8"))
+    os.replace(temp, text_path)
+
+    temp = chapters_path.with_name(chapters_path.name + ".part")
+    with open(temp, "w", encoding="utf-8") as file:
+        json.dump({"source": source, "chapters": chapters}, file, ensure_ascii=False)
+    os.replace(temp, chapters_path)
+
+    return text_path, chapters
+
+
+def chapter_sentences(book, chapters):
+    """Return the [(title, first sentence)] of the chapters of the "Book"."""
+    if book.file is None:
+        # The sentences don't match the file bytes (the book is built in memory).
+        return []
+
+    starts = book.offsets[0::2]
+
+    return [(title, min(bisect_left(starts, offset), len(book) - 1)) for title, offset in chapters]
@@ -0,0 +1,113 @@
+"""The language packs: the "preprocessing" and "voice_engine" modules of each language.
+
+A pack is a folder of the "languages" folder with both modules. The modules of a pack are
+imported on the first use, so only the languages of the opened books are loaded (with
+torch and their models). The language of a book is stored in its settings.
+The pack copied into "src/core" is the default language, it is used through the
+"src.core" modules, so its models are never loaded twice.
+"""
+import hashlib
+import importlib
+import importlib.util
+import threading
+from pathlib import Path
+
+
+__all__ = ["LanguagePack", "available_languages", "default_language", "get_language"]
+
+
+LANGUAGES_DIR = Path(__file__).resolve().parent.parent.parent / "languages"
+CORE_DIR = Path(__file__).resolve().parent
+# The name of the default language if the "src/core" modules match no pack.
+INSTALLED = "Installed"
+
+_packs = {}
+_packs_lock = threading.Lock()
+_default_language = None
+
+
+class LanguagePack:
+    """The modules of a language, imported on the first access."""
+    def __init__(self, name, path=None):
+        self.name = name
+        # The folder of the pack, None for the "src/core" modules.
+        self.path = path
+        self.modules = {}
+        self.lock = threading.Lock()
+
+    @property
+    def preprocessing(self):
+        return self.load("preprocessing")
+
+    @property
+    def voice_engine(self):
+        return self.load("voice_engine")
+
+    def load(self, name):
+        with self.lock:
+            if name not in self.modules:
+                if self.path is None:
+                    self.modules[name] = importlib.import_module(f"src.core.{name}")
+                else:
+                    spec = importlib.util.spec_from_file_location(
+                        f"{self.name}_{name}",
+                        self.path / f"{name}.py"
+                    )
+                    module = importlib.util.module_from_spec(spec)
+                    spec.loader.exec_module(module)
+                    self.modules[name] = module
+
+        return self.modules[name]
+
+
+def _file_hash(path):
+    return hashlib.sha1(path.read_bytes()).digest()
+
+
+def _discover():
+    """Return {name: folder} of the language packs."""
+    if not LANGUAGES_DIR.is_dir():
+        return {}
+
+    return {
+        folder.name: folder
+        for folder in sorted(LANGUAGES_DIR.iterdir())
+        if (folder / "preprocessing.py").exists() and (folder / "voice_engine.py").exists()
+    }
+
+
+def default_language():
+    """Return the name of the pack copied into "src/core"."""
+    global _default_language
+
+    if _default_language is None:
+        installed = [_file_hash(CORE_DIR / f"{name}.py") for name in ("preprocessing", "voice_engine")]
+        _default_language = INSTALLED
+        for name, folder in _discover().items():
+            if installed == [_file_hash(folder / f"{m}.py") for m in ("preprocessing", "voice_engine")]:
+                _default_language = name
+                break
+
+    return _default_language
+
+
+def available_languages():
+    names = list(_discover())
+    if default_language() not in names:
+        names.insert(0, default_language())
+
+    return names
+
+
+def get_language(name=None):
+    """Return the pack of the language, the default one for None or an unknown name."""
+    packs = _discover()
+    if name not in packs:
+        name = default_language()
+
+    with _packs_lock:
+        if name not in _packs:
+            path = None if name == default_language() else packs[name]
+            _packs[name] = LanguagePack(name, path)
+
+        return _packs[name]
@@ -0,0 +1,283 @@
+"""The library database: the books of the "books" folder with their reading state and settings.
+
+One SQLite file replaces the ".ini" file of each book, so the start and the book switch don't
+list or open a file per book. A book row keeps the size and the mtime of the text file, the
+hash of the text ("identity" of the "Book"), the number of sentences, the reading position,
+the time of the last reading and the other settings of the book (the speed, the language,
+the voice engine settings) as JSON.
+
+The updates ("save") are queued and written by a background thread in one transaction
+at most "FLUSH_INTERVAL" seconds later or at once after "FLUSH_UPDATES" updates, so the
+reading position is saved often without blocking the GUI or the reader on the disk.
+The written updates survive a crash of the app (the WAL journal).
+"""
+import json
+import sqlite3
+import threading
+import time
+
+
+__all__ = ["Library"]
+
+
+# The longest delay of a queued update and the number of updates written without a delay.
+FLUSH_INTERVAL = 2.0
+FLUSH_UPDATES = 100
+# The values kept in the columns of a book, the others are in the "settings" JSON.
+COLUMNS = ("current_sentence", "identity", "sentences", "last_read")
+
+SCHEMA_VERSION = 1
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS books (
+    name TEXT PRIMARY KEY,
+    size INTEGER,
+    mtime_ns INTEGER,
+    identity TEXT,
+    sentences INTEGER,
+    current_sentence INTEGER NOT NULL DEFAULT 0,
+    last_read REAL NOT NULL DEFAULT 0,
+    settings TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS books_last_read ON books (last_read DESC, name);
+"""
+
+
+class Library:
+    """The library database, it is opened on the first use."""
+    def __init__(self, path):
+        self.path = path
+        self.connection = None
+        # The GUI and the reader thread read the library.
+        self.lock = threading.RLock()
+
+        # The queued updates: {name: {key: value}}, the background thread writes them with
+        # its own connection, the readers don't wait for it (the WAL journal).
+        self.pending = {}
+        # The updates being written, they are merged by the readers until the commit.
+        self.flushing = {}
+        self.updates = 0
+        self.condition = threading.Condition()
+        self.writer = None
+        self.write_lock = threading.Lock()
+        self.thread = None
+        self.closed = False
+
+    def _open(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(str(self.path), check_same_thread=False)
+        # The "LIKE" of SQLite ignores the case of latin letters only.
+        connection.create_function("casefold", 1, str.casefold, deterministic=True)
+        # The export process reads the library while the app is running.
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        if connection.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            with connection:
+                connection.executescript(SCHEMA)
+                connection.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+        return connection
+
+    def _connect(self):
+        if self.connection is None:
+            self.connection = self._open()
+
+        return self.connection
+
+    def _execute(self, query, parameters=()):
+        """Run the query in a transaction, return the rows."""
+        with self.lock:
+            connection = self._connect()
+            with connection:
+                return connection.execute(query, parameters).fetchall()
+
+    def close(self):
+        """Write the queued updates and close the library."""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        self.flush()
+
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+        with self.write_lock:
+            if self.writer is not None:
+                self.writer.close()
+                self.writer = None
+        self.closed = False
+
+    def __len__(self):
+        return self._execute("SELECT count(*) FROM books")[0][0]
+
+    def __contains__(self, name):
+        return bool(self._execute("SELECT 1 FROM books WHERE name = ?", (name,)))
+
+    def names(self, search="", limit=None):
+        """Return the names of the books containing "search" (in any case), the last read first."""
+        # The last read times that aren't written yet, e.g. of the book opened just now.
+        with self.condition:
+            recent = {
+                name: values["last_read"]
+                for updates in (self.flushing, self.pending)
+                for name, values in updates.items() if "last_read" in values
+            }
+
+        rows = self._execute(
+            "SELECT name, last_read FROM books WHERE ? = '' OR instr(casefold(name), ?) > 0"
+            " ORDER BY last_read DESC, name LIMIT ?",
+            (search, search.casefold(), -1 if limit is None or recent else limit)
+        )
+        if recent:
+            rows = sorted(
+                ((name, recent.get(name, last_read)) for name, last_read in rows),
+                key=lambda row: (-row[1], row[0])
+            )[:limit]
+
+        return [row[0] for row in rows]
+
+    def sync(self, files):
+        """Match the library to the {name: (size, mtime_ns)} of the book files.
+
+        Return the lists of the added and the removed names.
+        """
+        self.flush()
+        with self.lock:
+            connection = self._connect()
+            known = {
+                name: (size, mtime_ns)
+                for name, size, mtime_ns in connection.execute(
+                    "SELECT name, size, mtime_ns FROM books"
+                )
+            }
+            added = [name for name in files if name not in known]
+            removed = [name for name in known if name not in files]
+            changed = [name for name in files if name in known and known[name] != files[name]]
+
+            with connection:
+                connection.executemany(
+                    "INSERT INTO books (name, size, mtime_ns) VALUES (?, ?, ?)",
+                    [(name, *files[name]) for name in added]
+                )
+                connection.executemany("DELETE FROM books WHERE name = ?", [(name,) for name in removed])
+                # The text has changed, its sentences are counted again on the opening.
+                connection.executemany(
+                    "UPDATE books SET size = ?, mtime_ns = ?, identity = NULL, sentences = NULL"
+                    " WHERE name = ?",
+                    [(*files[name], name) for name in changed]
+                )
+
+        return added, removed
+
+    def load(self, name):
+        """Return the settings of the book with its reading position, {} for an unknown book."""
+        # The queued updates are newer, they are taken before the database is read: they can
+        # be written meanwhile.
+        with self.condition:
+            updates = {**self.flushing.get(name, {}), **self.pending.get(name, {})}
+
+        rows = self._execute(
+            "SELECT current_sentence, settings FROM books WHERE name = ?", (name,)
+        )
+        if not rows:
+            return {}
+
+        current_sentence, settings = rows[0]
+        settings = json.loads(settings)
+        settings["current_sentence"] = current_sentence
+        settings.update(
+            (key, value) for key, value in updates.items()
+            if key == "current_sentence" or key not in COLUMNS
+        )
+
+        return settings
+
+    def save(self, name, **values):
+        """Queue the update of the book settings, "current_sentence" is the reading position."""
+        if "current_sentence" in values:
+            values["current_sentence"] = int(values["current_sentence"])
+
+        with self.condition:
+            self.pending.setdefault(name, {}).update(values)
+            self.updates += 1
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="Library", daemon=True)
+                self.thread.start()
+            self.condition.notify_all()
+
+    def opened(self, name, identity, sentences):
+        """Record the opening of the book: the hash of its text and the number of sentences."""
+        self.save(
+            name,
+            identity=identity.hex() if identity is not None else None,
+            sentences=sentences,
+            last_read=time.time()
+        )
+
+    def flush(self):
+        """Write the queued updates now."""
+        with self.write_lock:
+            with self.condition:
+                pending, self.pending = self.pending, {}
+                self.flushing = pending
+                self.updates = 0
+            if not pending:
+                return
+
+            try:
+                self._write(pending)
+            finally:
+                with self.condition:
+                    self.flushing = {}
+
+    def _write(self, pending):
+        """Write the updates in one transaction."""
+        if self.writer is None:
+            self.writer = self._open()
+        with self.writer:
+            for name, values in pending.items():
+                rows = self.writer.execute(
+                    "SELECT settings FROM books WHERE name = ?", (name,)
+                ).fetchall()
+                if not rows:
+                    continue
+
+                settings = json.loads(rows[0][0])
+                settings.update((k, v) for k, v in values.items() if k not in COLUMNS)
+                columns = [k for k in COLUMNS if k in values]
+                self.writer.execute(
+                    "UPDATE books SET settings = ?"
+                    + "".join(f", {k} = ?" for k in columns)
+                    + " WHERE name = ?",
+                    (json.dumps(settings, ensure_ascii=False),
+                     *(values[k] for k in columns), name)
+                )
+
+    def _run(self):
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.closed or self.pending)
+                if self.closed:
+                    return
+                # The first update waits for the others, up to the interval.
+                self.condition.wait_for(
+                    lambda: self.closed or self.updates >= FLUSH_UPDATES, FLUSH_INTERVAL
+                )
+                if self.closed:
+                    return
+
+            self.flush()
+
+    def info(self, name):
+        """Return the stored facts of the book file: size, mtime, identity and sentences."""
+        rows = self._execute(
+            "SELECT size, mtime_ns, identity, sentences, last_read FROM books WHERE name = ?",
+            (name,)
+        )
+        if not rows:
+            return None
+
+        return dict(zip(("size", "mtime_ns", "identity", "sentences", "last_read"), rows[0]))
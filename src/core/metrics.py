@@ -0,0 +1,115 @@
+"""The timing of the hot paths: preprocessing, synthesis, audio output and text updates.
+
+The hooks record into the "metrics" object of this module. Each measurement goes to a rolling
+histogram of its name (the last "HISTORY" values) and to a bounded trace of timestamped events,
+which can be exported as CSV or JSON to find the bottleneck when the reader stutters.
+While "metrics.enabled" is False the hooks do nothing.
+"""
+import csv
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+
+__all__ = ["Histogram", "Metrics", "metrics"]
+
+
+HISTORY = 1000
+TRACE_SIZE = 100000
+
+
+class Histogram:
+    """The rolling window of the last values of a measurement."""
+    def __init__(self, size=HISTORY):
+        self.values = deque(maxlen=size)
+        self.count = 0
+
+    def add(self, value):
+        self.values.append(value)
+        self.count += 1
+
+    def summary(self):
+        if not self.values:
+            return {"count": self.count}
+
+        values = np.fromiter(self.values, dtype=np.float64, count=len(self.values))
+        p50, p90, p99 = np.percentile(values, (50, 90, 99))
+
+        return {
+            "count": self.count,
+            "last": float(values[-1]),
+            "mean": float(values.mean()),
+            "p50": float(p50),
+            "p90": float(p90),
+            "p99": float(p99),
+            "max": float(values.max()),
+        }
+
+
+class Metrics:
+    """The named histograms and the trace of all measurements."""
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.histograms = {}
+        self.trace = deque(maxlen=TRACE_SIZE)
+        self.start = time.perf_counter()
+        self.lock = threading.Lock()
+
+    def record(self, name, value):
+        if not self.enabled:
+            return
+
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.add(value)
+            self.trace.append((time.perf_counter() - self.start, name, value))
+
+    @contextmanager
+    def timer(self, name):
+        """Record the run time of the block in milliseconds."""
+        if not self.enabled:
+            yield
+            return
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (time.perf_counter() - start) * 1000)
+
+    def summary(self):
+        with self.lock:
+            return {name: histogram.summary() for name, histogram in self.histograms.items()}
+
+    def clear(self):
+        with self.lock:
+            self.histograms.clear()
+            self.trace.clear()
+            self.start = time.perf_counter()
+
+    def export_csv(self, path):
+        """Write the trace: one "time,name,value" row per measurement."""
+        with self.lock:
+            trace = list(self.trace)
+
+        with open(path, "w", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+            writer.writerow(("time", "name", "value"))
+            writer.writerows(trace)
+
+    def export_json(self, path):
+        """Write the summary of the histograms and the trace."""
+        with self.lock:
+            trace = [{"time": t, "name": name, "value": value} for t, name, value in self.trace]
+
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump({"summary": self.summary(), "trace": trace}, file, indent=2)
+
+
+metrics = Metrics()
@@ -0,0 +1,174 @@
+"""The sentences of a book prepared for the voice engine.
+
+The whole book is preprocessed by a background thread ahead of the playback: from the
+reading position to the end and then from the beginning. When it is done, the prepared
+sentences and the readable mask are stored in the "config/books/<book>.prep" file next to
+the sentence index, so the next time the book is opened they are only memory-mapped.
+"""
+import mmap
+import struct
+import threading
+from array import array
+from itertools import chain
+
+from src.core import preprocessing as default_preprocessing
+from src.core.book import Book
+from src.core.metrics import metrics
+
+
+__all__ = ["PreparedBook"]
+
+
+# Magic, book identity, number of sentences.
+HEADER = struct.Struct("<4s40sQ")
+MAGIC = b"VBP1"
+
+# The values of the readable mask. The preprocessing has failed on a "FAILED" sentence,
+# it is prepared again on request to raise the error.
+UNKNOWN, READABLE, UNREADABLE, FAILED = 0, 1, 2, 3
+
+
+class PreparedBook:
+    """The sequence of prepared sentences with the O(1) readable check.
+
+    A sentence that isn't prepared yet by the background thread is prepared on request.
+    "preprocessing" is the module of the book language.
+    """
+    def __init__(self, book, path=None, preprocessing=default_preprocessing):
+        self.book = book
+        self.path = path
+        self.preprocessing = preprocessing
+        # The prepared sentences loaded from the file.
+        self.prepared = None
+        # The prepared sentences before the file is written: {index: sentence}.
+        self.sentences = {}
+        self.mask = bytearray(len(book))
+
+        self.file = None
+        self.thread = None
+        self.stopped = False
+
+        if self.path is not None and self.book.identity is not None:
+            self.load()
+
+    def __len__(self):
+        return len(self.book)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __getitem__(self, index):
+        if self.mask[index] == FAILED:
+            return self.prepare(index)
+        if self.prepared is not None:
+            return self.prepared[index]
+
+        sentence = self.sentences.get(index)
+        if sentence is None:
+            sentence = self.prepare(index)
+
+        return sentence
+
+    def is_readable(self, index):
+        if self.mask[index] in (UNKNOWN, FAILED):
+            self.prepare(index)
+
+        return self.mask[index] == READABLE
+
+    def prepare(self, index):
+        with metrics.timer("prepare_sentence_ms"):
+            # This "prepare_sentence" function is from the "preprocessing" module.
+            sentence = self.preprocessing.prepare_sentence(self.book[index])
+        self.sentences[index] = sentence
+        # This "check_readable_symbols" function is from the "preprocessing" module.
+        readable = self.preprocessing.check_readable_symbols(sentence)
+        self.mask[index] = READABLE if readable else UNREADABLE
+
+        return sentence
+
+    def start(self, position):
+        """Prepare the rest of the book in the background, beginning from the position."""
+        if self.prepared is not None or self.thread is not None:
+            return
+
+        self.thread = threading.Thread(
+            target=self._run,
+            args=(position,),
+            name="PreparedBook",
+            daemon=True
+        )
+        self.thread.start()
+
+    def prepare_all(self):
+        """Prepare the whole book in the calling thread."""
+        if self.prepared is None:
+            self._run(0)
+
+    def close(self):
+        self.stopped = True
+        if self.thread is not None:
+            self.thread.join()
+        if self.file is not None:
+            self.prepared.data.close()
+            self.file.close()
+            self.file = None
+
+    def _run(self, position):
+        position = max(min(position, len(self)), 0)
+        for index in chain(range(position, len(self)), range(0, position)):
+            if self.stopped:
+                return
+            if self.mask[index] == UNKNOWN:
+                try:
+                    self.prepare(index)
+                except Exception:
+                    self.mask[index] = FAILED
+
+        if self.path is not None and self.book.identity is not None:
+            self.save()
+            self.load()
+
+    def save(self):
+        data = bytearray()
+        offsets = array("Q")
+        # The offsets are absolute positions in the file, the data follows them.
+        start = HEADER.size + len(self) + len(self) * 2 * offsets.itemsize
+        for index in range(len(self)):
+            offsets.append(start + len(data))
+            data += self.sentences.get(index, "").encode("utf-8")
+            offsets.append(start + len(data))
+
+        temp = self.path.with_name(self.path.name + ".tmp")
+        with temp.open("wb") as file:
+            file.write(HEADER.pack(MAGIC, self.book.identity, len(self)))
+            file.write(self.mask)
+            offsets.tofile(file)
+            file.write(data)
+        temp.replace(self.path)
+
+    def load(self):
+        """Load the prepared sentences from the file if it matches the book."""
+        try:
+            file = self.path.open("rb")
+        except OSError:
+            return
+
+        try:
+            magic, identity, count = HEADER.unpack(file.read(HEADER.size))
+            if magic != MAGIC or identity != self.book.identity or count != len(self):
+                file.close()
+                return
+
+            mask = bytearray(file.read(count))
+            offsets = array("Q")
+            offsets.fromfile(file, count * 2)
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, EOFError, ValueError, struct.error):
+            file.close()
+            return
+
+        self.mask = mask
+        self.prepared = Book(data, offsets)
+        self.file = file
+        self.sentences = {}
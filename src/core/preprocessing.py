@@ -8,6 +8,7 @@ English version.
 """
 import re
 import os
+from functools import lru_cache
 from nltk.tokenize import sent_tokenize
 from num2words import num2words
 
@@ -15,16 +16,19 @@ from num2words import num2words
 __all__ = ["prepare_book", "prepare_sentence", "check_readable_symbols"]
 
 
+NUMBER_PATTERN = re.compile(r"[+-]?\d*[.,]?\d+")
+
+
+@lru_cache(maxsize=4096)
+def number_to_words(number):
+    # "num2words" is a library that converts numbers to words.
+    # It doesn"t work with commas.
+    return num2words(number.replace(",", "."), lang="en")
+
+
 def numbers_to_words(text):
-    """Find all numeric values and replace them by words."""
-    for match in re.findall(r"[+-]?\d*[.,]?\d+", text):
-        # "num2words" is a library that converts numbers to words.
-        # It doesn"t work with commas.
-        repl = num2words(re.sub(",", ".", match), lang="en")
-        # Replace the pattern by the repl: re.sub(pattern, repl, string, count).
-        text = re.sub(match, repl, text, 1)
-    
-    return text
+    """Find all numeric values and replace them by words in one pass."""
+    return NUMBER_PATTERN.sub(lambda match: number_to_words(match.group()), text)
 
 
 def check_readable_symbols(text):
@@ -1,27 +1,90 @@
-import sounddevice as sd
-from PySide6.QtCore import QObject, Signal, Slot, QSettings
+import threading
 
-from src.core.preprocessing import prepare_book, prepare_sentence, check_readable_symbols
-from src.core.voice_engine import text_to_speech
+import numpy as np
+from PySide6.QtCore import QObject, Signal, Slot
+
+from src.core.book import open_book
+from src.core.formats import chapter_sentences, extract_book, find_book
+from src.core.languages import get_language
+from src.core.prepared_book import PreparedBook
+from src.core.synthesis import SynthesisQueue
+from src.core.audio_cache import AudioCache
+from src.core.audio_output import AudioOutput
+from src.core.metrics import metrics
+from src.core.time_stretch import TimeStretch
+
+
+class BookError(Exception):
+    """No book of the library can be opened."""
 
 
 class Reader(QObject):
     """This is the implementation of a voice reader."""
     reading_finished_signal = Signal(str)
-    update_text_signal = Signal(str)
+    update_text_signal = Signal(int)
+    # The sentence and the (start, end) characters of the spoken word in it.
+    word_signal = Signal(int, int, int)
+    # The voice engine has loaded torch and the model, the error message or None.
+    voice_loaded_signal = Signal(str)
     
     def __init__(self, main_widget, config):
         super(Reader, self).__init__()
 
         self.main_widget = main_widget
         self.config = config
+        
+        # The size limit of the audio cache in megabytes.
+        self.audio_cache = AudioCache(
+            self.config.cache_dir / "audio",
+            int(self.config.settings.value("audio_cache_size", 500)) * 1024 * 1024
+        )
+        # The sample rate of the audio output, the voice engine audio is resampled to it.
+        self.SAMPLE_RATE = 48000
+        # The number of sentences synthesized ahead of the current one and the length
+        # (in characters) of chunks the long sentences are voiced by.
+        self.synthesis_queue = SynthesisQueue(
+            int(self.config.settings.value("lookahead", 3)),
+            self.audio_cache,
+            int(self.config.settings.value("chunk_size", 150)),
+            self.SAMPLE_RATE
+        )
+        
         self.load_settings()
-        self.load_book()
+        # The message of the book that couldn't be opened, it is shown with the window.
+        self.book_error = self.load_book()
+        if self.book_error:
+            # Another book of the library is opened.
+            broken_book = self.current_book
+            for book in self.config.library.names():
+                if book == broken_book:
+                    continue
+                self.config.settings.setValue("current_book", book)
+                self.load_settings()
+                if self.load_book() is None:
+                    break
+            else:
+                raise BookError(self.book_error)
         
         self.current_reading_position = False
         
         self.CHUNK = 1024
-        self.stream = sd.OutputStream(samplerate=48000, channels=1)
+        # The end of a sentence (in samples) that is still playing when the next sentence is
+        # written to the output, so the sentences follow each other without a gap.
+        self.TAIL = 4096
+        # The reading position in a sentence is checkpointed every 5 seconds of the audio.
+        self.CHECKPOINT = 5 * self.SAMPLE_RATE
+        
+        # "audio_latency" is "low", "high" or the latency in seconds.
+        latency = self.config.settings.value("audio_latency", "low")
+        try:
+            latency = float(latency)
+        except ValueError:
+            pass
+        self.output = AudioOutput(
+            samplerate=self.SAMPLE_RATE,
+            blocksize=int(self.config.settings.value("audio_blocksize", 512)),
+            latency=latency
+        )
         
         # This is the receiver of signals from buttons.
         # 0 - stop the reading process (pause/settings button)
@@ -41,26 +104,29 @@ class Reader(QObject):
                 case 0:
                     break
                 case 1:
-                    if not self.current_reading_position:
-                        # This "prepare_sentence" function is from the "preprocessing" module.
-                        sentence = prepare_sentence(self.book[self.current_sentence])
-                        # This "check_readable_symbols" function is from the "preprocessing"
-                        # module.
-                        if check_readable_symbols(sentence):
-                            try:
-                                # This "text_to_speech" function is from the "voice_engine"
-                                # module.
-                                audio = text_to_speech(sentence)
-                            except:
-                                error = "Text to speech function has failed."
-                                self.process_state = 0
+                    try:
+                        if self.current_reading_position:
+                            self.play()
+                        elif not self.prepared_book.is_readable(self.current_sentence):
+                            # No readable symbols, next sentence (direction == True).
+                            self.change_current_sentence(True)
+                        # Wait for the sentence in short steps to stay responsive to the buttons.
+                        elif self.synthesis_queue.wait(self.current_sentence, 0.1):
+                            metrics.record("queue_depth", self.synthesis_queue.ready())
+                            # The sentence is prepared and voiced ahead by the synthesis queue.
+                            audio = self.synthesis_queue.get(self.current_sentence)
+                            # The saved position is used once, the later reading of the
+                            # sentence (a click, a jump) starts from its beginning.
+                            resume, self.resume = self.resume, None
+                            if resume and resume[0] == self.current_sentence:
+                                # Continue from the position saved by the previous session.
+                                self.current_reading_position = (audio, resume[1])
+                                self.play()
                             else:
                                 self.play(audio)
-                        else:
-                            # Next sentence (direction == True).
-                            self.change_current_sentence(True)
-                    else:
-                        self.play()
+                    except:
+                        error = "Text to speech function has failed."
+                        self.process_state = 0
                 case 2:
                     self.process_state = 1
                     self.current_reading_position = False
@@ -72,6 +138,10 @@ class Reader(QObject):
                     # Next sentence (direction == True).
                     self.change_current_sentence(True)
         
+        # Release the audio device until the next reading, the end of the book is played
+        # to the last sample.
+        self.output.stop()
+        
         # Finishing of "Reader" work.
         self.reading_finished_signal.emit(error)
     
@@ -91,85 +161,202 @@ class Reader(QObject):
                 self.update_plain_text()
     
     def play(self, audio=False):
-        """Play the audio string from voice engine."""
+        """Play the audio string ("SentenceAudio") from voice engine.
+        
+        The audio string may be still growing: the playback of a long sentence starts with its
+        first chunk.
+        """
         if self.current_reading_position:
             audio, cursor = self.current_reading_position
         else:
             # It is a position in the audio string to resumption of reading.
             cursor = 0
         
-        self.stream.start()
+        self.output.start()
+        # The output stream position where the playback from the cursor begins. The output
+        # runs "speed" times faster than the audio string.
+        start = self.output.written
+        base = cursor
+        speed = self.speed
+        stretch = TimeStretch(speed, self.output.samplerate)
+        # The stretched audio that isn't written to the output yet.
+        pending = np.zeros(0, dtype=np.float32)
+        flushed = False
+        underruns = self.output.underruns
+        spoken_word = -1
+        checkpoint = cursor
+        self.saved_position = (self.current_sentence, cursor)
         
-        for cursor in range(cursor, len(audio), self.CHUNK):
+        while True:
             match self.process_state:
                 case 0:
+                    # Silence the output at once and keep the played position.
+                    self.output.pause()
+                    played = int(max(self.output.played - start, 0) * speed)
+                    cursor = min(base + played, cursor)
                     self.current_reading_position = (audio, cursor)
+                    self.output.clear()
+                    self.saved_position = (self.current_sentence, cursor)
+                    self.checkpoint()
                     break
                 case 1:
-                    self.stream.write(audio[cursor:cursor+self.CHUNK])
+                    position = base + int(max(self.output.played - start, 0) * speed)
+                    if position - checkpoint >= self.CHECKPOINT:
+                        checkpoint = position
+                        self.saved_position = (self.current_sentence, position)
+                        self.checkpoint()
+                    
+                    # The word timings are known when the sentence is voiced completely.
+                    if audio.words is not None:
+                        word = audio.words.word_at(position)
+                        if word != spoken_word and word >= 0:
+                            spoken_word = word
+                            self.word_signal.emit(self.current_sentence, *audio.words.span(word))
+                    
+                    samples = audio.samples
+                    if audio.dropped:
+                        # The audio is partial (e.g. the voice was changed on a pause),
+                        # the sentence is voiced again and read from its beginning.
+                        self.current_reading_position = False
+                        break
+                    elif len(pending):
+                        with metrics.timer("output_write_ms"):
+                            pending = pending[self.output.write(pending[:self.CHUNK], 0.05):]
+                    elif cursor < len(samples):
+                        with metrics.timer("time_stretch_ms"):
+                            pending = stretch.process(samples[cursor:cursor+self.CHUNK])
+                        cursor = min(cursor + self.CHUNK, len(samples))
+                    elif not audio.done:
+                        # Wait for the next chunk of the sentence.
+                        audio.wait(cursor, 0.05)
+                    elif audio.error is not None:
+                        self.current_reading_position = False
+                        raise audio.error
+                    elif not flushed:
+                        pending = stretch.flush()
+                        flushed = True
+                    elif self.output.wait_played(self.output.written - self.TAIL, 0.05):
+                        metrics.record("underruns", self.output.underruns - underruns)
+                        self.current_reading_position = False
+                        # Next sentence (direction == True).
+                        self.change_current_sentence(True)
+                        break
                 case _:
+                    self.output.clear()
                     self.current_reading_position = False
                     break
-        else:
-            self.current_reading_position = False
-            # Next sentence (direction == True).
-            self.change_current_sentence(True)
-        
-        self.stream.stop()
     
     @Slot()
     def load_settings(self):
         """Load the "Reader" settings from the settings store."""
         self.current_book = self.config.settings.value("current_book")
 
-        if (self.current_book == None
-            or not (self.config.config_dir / "books" / f"{self.current_book}.ini").exists()):
-            # Choose the first one element from the generator object.
-            self.current_book = next(
-                f.stem
-                for f in (self.config.config_dir / "books").glob("*.ini")
-            )
+        if self.current_book == None or self.current_book not in self.config.library:
+            # The last read book.
+            self.current_book = self.config.library.names(limit=1)[0]
+        
+        book_settings = self.config.library.load(self.current_book)
         
-        book_settings = QSettings(
-            str(self.config.config_dir / "books" / f"{self.current_book}.ini"),
-            QSettings.IniFormat
+        self.current_sentence = int(book_settings.get("current_sentence", 0))
+        # The (sentence, sample) of the sentence audio where the reading was stopped, the first
+        # reading continues from it.
+        self.resume = (
+            self.current_sentence,
+            int(float(book_settings.get("current_offset", 0)) * self.SAMPLE_RATE)
         )
+        # The (sentence, sample) of the current reading position that is saved.
+        self.saved_position = self.resume
         
-        self.current_sentence = book_settings.value("current_sentence")
-        if self.current_sentence == None:
-            self.current_sentence = 0
-        else:
-            self.current_sentence = int(self.current_sentence)
+        # The playback speed, the pitch stays the same.
+        self.speed = float(book_settings.get("speed", 1.0))
+        
+        # The language pack of the book, the default one for books without the setting.
+        self.language = get_language(book_settings.get("language"))
     
     def save_settings(self):
         """Copy "Reader" settings values to the settings store."""
         self.config.settings.setValue("current_book", self.current_book)
         
-        book_settings = QSettings(
-            str(self.config.config_dir / "books" / f"{self.current_book}.ini"),
-            QSettings.IniFormat
+        self.checkpoint()
+        self.config.library.save(self.current_book, speed=self.speed, language=self.language.name)
+    
+    def checkpoint(self):
+        """Queue the reading position for the library, it doesn't wait for the disk."""
+        # The position in the sentence is kept until the reading moves to another one.
+        if self.saved_position and self.saved_position[0] != self.current_sentence:
+            self.saved_position = None
+        
+        self.config.library.save(
+            self.current_book,
+            current_sentence=self.current_sentence,
+            current_offset=(
+                round(self.saved_position[1] / self.SAMPLE_RATE, 3) if self.saved_position else 0
+            )
         )
-        book_settings.setValue("current_sentence", self.current_sentence)
     
     def load_book(self):
-        with (self.config.books_dir / f"{self.current_book}.txt").open(encoding="utf-8") as file:
-            self.book = file.read()
-        # This "prepare_book" function is from the "preprocessing" module.
-        self.book = prepare_book(self.book)
+        """Open the current book, return the error message if it can't be opened.
+        
+        The previous book stays open on an error.
+        """
+        previous_book = getattr(self, "book", None)
+        previous_prepared_book = getattr(self, "prepared_book", None)
+        
+        # The text of EPUB, FB2 and HTML books, the sentence boundaries and the prepared
+        # sentences are cached next to the book settings.
+        try:
+            book_path = find_book(self.config.books_dir, self.current_book)
+            if book_path is None:
+                raise FileNotFoundError(self.current_book)
+            text_path, chapters = extract_book(book_path, self.config.config_dir / "books")
+            book = open_book(
+                text_path,
+                self.config.config_dir / "books" / f"{self.current_book}.idx",
+                self.language.preprocessing
+            )
+        except Exception:
+            return f"The book '{self.current_book}' can't be opened."
+        
+        self.book = book
+        # The (title, first sentence) of the chapters, there are none in ".txt" books.
+        self.chapters = chapter_sentences(self.book, chapters)
+        # Another language (or a changed text) splits the book into other sentences.
+        self.current_sentence = max(min(self.current_sentence, len(self.book) - 1), 0)
+        self.prepared_book = PreparedBook(
+            self.book,
+            self.config.config_dir / "books" / f"{self.current_book}.prep",
+            self.language.preprocessing
+        )
+        # Preprocess the whole book ahead of the playback.
+        if self.config.settings.value("preprocess_book", "true") == "true":
+            self.prepared_book.start(self.current_sentence)
+        self.synthesis_queue.set_book(self.prepared_book, self.language.voice_engine)
+        self.config.library.opened(self.current_book, self.book.identity, len(self.book))
+        
+        if previous_book is not None:
+            previous_prepared_book.close()
+            previous_book.close()
+        
+        return None
+    
+    def load_voice(self):
+        """Load torch and the model of the book language in the background."""
+        voice_engine = self.language.voice_engine
+        
+        def load():
+            error = None
+            try:
+                with metrics.timer("load_voice_ms"):
+                    # This "load_voice" function is from the "voice_engine" module.
+                    voice_engine.load_voice()
+            except:
+                error = "The voice model has failed to load."
+            self.voice_loaded_signal.emit(error)
+        
+        threading.Thread(target=load, name="LoadVoice", daemon=True).start()
     
     def update_plain_text(self):
-        """Prepare and send the content to show in the plain text widget."""
-        content = ""
-        for i in range(0,100):
-            if self.current_sentence - i < 0:
-                break
-            
-            content = ("\n::"
-                       +str(self.current_sentence-i)
-                       +"::\n"
-                       +self.book[self.current_sentence-i]
-                       +"\n"
-                       +content)
-        
-        # Send the content to MainWidget's slot.
-        self.update_text_signal.emit(content)
\ No newline at end of file
+        """Send the current sentence to show in the text view, checkpoint the reading position."""
+        self.checkpoint()
+        # Send the index to MainWidget's slot, the text view reads the sentences from the book.
+        self.update_text_signal.emit(self.current_sentence)
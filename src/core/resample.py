@@ -0,0 +1,48 @@
+"""The resampling of the voice engine audio to the sample rate of the audio output.
+
+The voice engine is cheaper at a lower sample rate, the supported rates (8000, 24000) divide
+the output rate (48000), so the audio is upsampled by an integer factor with a polyphase
+windowed-sinc filter: one short convolution per output phase.
+"""
+import numpy as np
+
+
+__all__ = ["resample"]
+
+
+# The filter taps on each side of a sample, per phase.
+HALF_WIDTH = 16
+
+_filters = {}
+
+
+def polyphase_filter(factor):
+    """Return the filter of the upsampling by the factor split into "factor" phases."""
+    if factor not in _filters:
+        center = HALF_WIDTH * factor
+        k = np.arange(2 * center + 1)
+        taps = np.sinc((k - center) / factor) * np.kaiser(len(k), 8.0)
+        _filters[factor] = [taps[phase::factor].astype(np.float32) for phase in range(factor)]
+
+    return _filters[factor]
+
+
+def resample(audio, rate, target_rate):
+    """Resample the audio string from "rate" to "target_rate"."""
+    audio = np.asarray(audio, dtype=np.float32)
+    if rate == target_rate or not len(audio):
+        return audio
+
+    if target_rate % rate:
+        # Not an integer factor: the linear interpolation.
+        length = int(round(len(audio) * target_rate / rate))
+        positions = np.arange(length) * (rate / target_rate)
+        return np.interp(positions, np.arange(len(audio)), audio).astype(np.float32)
+
+    factor = target_rate // rate
+    output = np.empty(len(audio) * factor, dtype=np.float32)
+    for phase, taps in enumerate(polyphase_filter(factor)):
+        # The output sample n * factor + phase is centered on the input sample n.
+        output[phase::factor] = np.convolve(audio, taps)[HALF_WIDTH:HALF_WIDTH + len(audio)]
+
+    return output
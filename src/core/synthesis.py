@@ -0,0 +1,355 @@
+"""The background synthesis of sentences ahead of the reading position.
+
+The worker thread voices the next sentences while the current one is playing,
+so the reader does not wait for the voice engine on every sentence boundary.
+Long sentences are voiced by chunks and can be played before they are complete.
+"""
+import threading
+import time
+
+import numpy as np
+
+from src.core.chunking import split_sentence
+from src.core import voice_engine as default_voice_engine
+from src.core.metrics import metrics
+from src.core.resample import resample
+from src.core.word_timing import estimate_word_timings
+
+
+__all__ = ["SentenceAudio", "SynthesisQueue"]
+
+
+# Up to "BATCH_SIZE" short sentences ahead of the reading position are voiced in one batch.
+BATCH_SIZE = 8
+BATCH_SENTENCE_LENGTH = 100
+
+
+class SentenceAudio:
+    """The audio string of a sentence that grows while its chunks are voiced.
+
+    "samples" is the audio voiced so far, it is replaced (not changed) by every chunk,
+    so a reader can keep a reference to it without the lock.
+    "words" is the "WordTimings" of the sentence, it is set when the audio is complete.
+    "dropped" is set when the queue has dropped the audio before it was complete (a seek,
+    a settings change): the audio is partial, the sentence is requested from the queue again.
+    """
+    def __init__(self):
+        self.samples = np.zeros(0, dtype=np.float32)
+        self.words = None
+        self.done = False
+        self.error = None
+        self.dropped = False
+        self.condition = threading.Condition()
+
+    def __len__(self):
+        return len(self.samples)
+
+    def append(self, chunk):
+        with self.condition:
+            self.samples = np.concatenate((self.samples, np.asarray(chunk, dtype=np.float32)))
+            self.condition.notify_all()
+
+    def finish(self, error=None, dropped=False):
+        with self.condition:
+            self.done = True
+            self.error = error
+            self.dropped = dropped
+            self.condition.notify_all()
+
+    def wait(self, length, timeout):
+        """Wait for more than "length" samples or the end of the synthesis."""
+        with self.condition:
+            return self.condition.wait_for(
+                lambda: len(self.samples) > length or self.done,
+                timeout
+            )
+
+
+class SynthesisQueue:
+    """Bounded lookahead queue of synthesized sentences, keyed by the sentence index.
+
+    The results are kept for the window [position - 1, position + depth], so moving forward
+    reuses the work already done, one step back is free and jumps discard the rest.
+    A result is a "SentenceAudio" or None for a sentence without readable symbols.
+    Sentences longer than "chunk_size" characters are voiced by chunks, short sentences ahead
+    of the reading position are voiced by batches.
+    The audio cache (optional) is consulted before the voice engine, it keeps the audio at the
+    rate of the voice engine. The results are resampled to "samplerate" of the audio output.
+    """
+    def __init__(self, depth, cache=None, chunk_size=0, samplerate=48000):
+        self.depth = max(0, depth)
+        self.cache = cache
+        self.chunk_size = chunk_size
+        self.samplerate = samplerate
+        self.book = None
+        # The "voice_engine" module of the book language.
+        self.voice_engine = default_voice_engine
+        self.position = None
+        self.results = {}
+        self.closed = False
+
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(target=self._run, name="SynthesisQueue", daemon=True)
+        self.thread.start()
+
+    def set_book(self, book, voice_engine=default_voice_engine):
+        """Change the book ("PreparedBook") and its voice engine, drop all queued work."""
+        with self.condition:
+            self.book = book
+            self.voice_engine = voice_engine
+            self.position = None
+            self._invalidate()
+
+    def clear(self):
+        """Drop all queued work, e.g. after the voice engine settings were changed."""
+        with self.condition:
+            self._invalidate()
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def ready(self):
+        """Return the number of voiced sentences from the reading position on."""
+        with self.condition:
+            if self.position is None:
+                return 0
+            return sum(
+                1 for i, result in self.results.items()
+                if i >= self.position and (result is None or result.done)
+            )
+
+    def wait(self, index, timeout):
+        """Move the queue to the index and wait up to "timeout" seconds for its first chunk."""
+        with self.condition:
+            self._seek(index)
+            if not self.condition.wait_for(lambda: index in self.results, timeout):
+                return False
+            result = self.results[index]
+
+        return result is None or result.wait(0, timeout)
+
+    def get(self, index):
+        """Return the result for the index, wait for its first chunk if it isn't ready."""
+        with self.condition:
+            self._seek(index)
+            self.condition.wait_for(lambda: index in self.results)
+            result = self.results[index]
+
+        if result is not None:
+            result.wait(0, None)
+            if result.error is not None:
+                with self.condition:
+                    # Let the next attempt run the voice engine again.
+                    if self.results.get(index) is result:
+                        del self.results[index]
+                raise result.error
+
+        return result
+
+    def _invalidate(self):
+        self.results.clear()
+        self.condition.notify_all()
+
+    def _seek(self, index):
+        if self.position == index:
+            return
+
+        self.position = index
+        for i in list(self.results):
+            if not index - 1 <= i <= index + self.depth:
+                del self.results[i]
+        self.condition.notify_all()
+
+    def _next_task(self):
+        """Return the first index of the window that has no result yet."""
+        if self.book is None or self.position is None:
+            return None
+
+        for i in range(self.position, min(self.position + self.depth + 1, len(self.book))):
+            if i not in self.results:
+                return i
+
+        return None
+
+    def _run(self):
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.closed or self._next_task() is not None)
+                if self.closed:
+                    return
+
+                index = self._next_task()
+                try:
+                    readable = self.book.is_readable(index)
+                except Exception as e:
+                    # The preprocessing has failed, "get" raises the error.
+                    audio = SentenceAudio()
+                    audio.finish(e)
+                    self.results[index] = audio
+                    self.condition.notify_all()
+                    continue
+                if not readable:
+                    self.results[index] = None
+                    self.condition.notify_all()
+                    continue
+
+                book, engine = self.book, self.voice_engine
+                batch = self._batch(index)
+                # The book text of the words is read under the lock: the book is closed
+                # when another one is opened.
+                texts = [book.book[i] for i, sentence, audio in batch]
+                # The results are visible before they are complete, the reader can start
+                # playing them.
+                for i, sentence, audio in batch:
+                    self.results[i] = audio
+                self.condition.notify_all()
+
+            # The synthesis runs without the lock, so the reader can seek meanwhile.
+            try:
+                if len(batch) == 1:
+                    self._voice(engine, *batch[0])
+                else:
+                    self._voice_batch(engine, batch)
+            except Exception as e:
+                for i, sentence, audio in batch:
+                    audio.finish(e)
+            else:
+                for (i, sentence, audio), text in zip(batch, texts):
+                    if self._dropped(i, audio):
+                        # The voicing has stopped early or was voiced with the old settings.
+                        audio.finish(dropped=True)
+                        continue
+                    # The words are timed in the book text, as it is shown.
+                    audio.words = estimate_word_timings(text, len(audio), book.preprocessing)
+                    audio.finish()
+
+    def _batch(self, index):
+        """Return the list of (index, sentence, audio) to voice together, starting from the index.
+
+        The sentence the reader waits for is voiced alone, batches are only for the next ones.
+        """
+        batch = [(index, self.book[index], SentenceAudio())]
+        if index == self.position or len(batch[0][1]) > BATCH_SENTENCE_LENGTH:
+            return batch
+
+        last = min(self.position + self.depth + 1, len(self.book))
+        for i in range(index + 1, last):
+            if len(batch) == BATCH_SIZE or i in self.results:
+                break
+            try:
+                if not self.book.is_readable(i) or len(self.book[i]) > BATCH_SENTENCE_LENGTH:
+                    break
+            except Exception:
+                # The sentence is the next task, its error is kept as its result.
+                break
+            batch.append((i, self.book[i], SentenceAudio()))
+
+        return batch
+
+    def _dropped(self, index, audio):
+        """The result isn't needed anymore: moved out of the window or invalidated."""
+        with self.condition:
+            return self.results.get(index) is not audio
+
+    def _retry(self, batch):
+        """Drop the results of the batch, they are voiced again with the new settings."""
+        with self.condition:
+            for i, sentence, audio in batch:
+                if self.results.get(i) is audio:
+                    del self.results[i]
+            self.condition.notify_all()
+
+    def _changed(self, engine, voice_id, rate):
+        """The voice engine settings were changed during the synthesis.
+
+        The engine reads its settings when it voices a text, so the audio may be voiced with
+        the new settings: it isn't cached under the old voice id or resampled from the old rate.
+        """
+        if engine.SAMPLE_RATE != rate:
+            return True
+        # This "get_voice_id" function is from the "voice_engine" module.
+        return voice_id is not None and engine.get_voice_id() != voice_id
+
+    def _voice(self, engine, index, sentence, audio):
+        # The sample rate of the voice engine.
+        rate = engine.SAMPLE_RATE
+        voice_id = None
+        if self.cache is not None:
+            # This "get_voice_id" function is from the "voice_engine" module.
+            voice_id = engine.get_voice_id()
+            key = self.cache.key(sentence, voice_id)
+            cached = self.cache.get(key)
+            if cached is not None:
+                audio.append(resample(cached, rate, self.samplerate))
+                return
+
+        start = time.perf_counter()
+        voiced = []
+        for chunk in split_sentence(sentence, self.chunk_size):
+            if self._dropped(index, audio):
+                return
+            chunk_start = time.perf_counter()
+            samples = self.synthesize(chunk, engine)
+            if self._changed(engine, voice_id, rate):
+                self._retry([(index, sentence, audio)])
+                return
+            self._record(time.perf_counter() - chunk_start, len(samples) / rate, 1)
+            voiced.append(samples)
+            audio.append(resample(samples, rate, self.samplerate))
+
+        if self.cache is not None:
+            self.cache.put(key, np.concatenate(voiced), time.perf_counter() - start)
+
+    def _voice_batch(self, engine, batch):
+        # The sample rate of the voice engine.
+        rate = engine.SAMPLE_RATE
+        voice_id = None
+        if self.cache is not None:
+            # This "get_voice_id" function is from the "voice_engine" module.
+            voice_id = engine.get_voice_id()
+            misses = []
+            for i, sentence, audio in batch:
+                cached = self.cache.get(self.cache.key(sentence, voice_id))
+                if cached is not None:
+                    audio.append(resample(cached, rate, self.samplerate))
+                else:
+                    misses.append((i, sentence, audio))
+            batch = misses
+
+        if not batch:
+            return
+
+        start = time.perf_counter()
+        audio_list = self.synthesize_batch([sentence for i, sentence, audio in batch], engine)
+        batch_time = time.perf_counter() - start
+        if self._changed(engine, voice_id, rate):
+            self._retry(batch)
+            return
+        self._record(batch_time, sum(len(samples) for samples in audio_list) / rate, len(batch))
+        # The time per sentence for the cache statistics.
+        synthesis_time = batch_time / len(batch)
+
+        for (i, sentence, audio), samples in zip(batch, audio_list):
+            if self._dropped(i, audio):
+                continue
+            audio.append(resample(samples, rate, self.samplerate))
+            if self.cache is not None:
+                self.cache.put(self.cache.key(sentence, voice_id), samples, synthesis_time)
+
+    def _record(self, synthesis_time, duration, count):
+        """Record the latency per text and the real-time factor of the voice engine."""
+        metrics.record("text_to_speech_ms", synthesis_time / count * 1000)
+        if duration:
+            metrics.record("real_time_factor", synthesis_time / duration)
+
+    def synthesize_batch(self, texts, voice_engine):
+        """Voice the list of prepared texts."""
+        # This "text_to_speech_batch" function is from the "voice_engine" module.
+        return voice_engine.text_to_speech_batch(texts)
+
+    def synthesize(self, text, voice_engine):
+        """Voice the prepared text."""
+        # This "text_to_speech" function is from the "voice_engine" module.
+        return voice_engine.text_to_speech(text)
@@ -0,0 +1,120 @@
+"""The change of the playback speed without the change of the pitch.
+
+WSOLA (waveform similarity overlap-add): the audio is cut into overlapping windowed frames
+that are taken from the input "speed" times faster than they are added to the output.
+Each frame is shifted within a small tolerance to the position where it is the most similar
+to the natural continuation of the previous frame, so the periods of the voice are not
+broken. The audio is processed in streaming blocks, the latency is about one frame.
+"""
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+__all__ = ["TimeStretch"]
+
+
+class TimeStretch:
+    """The streaming time stretch of one audio string, "speed" > 1 makes it shorter."""
+    def __init__(self, speed, samplerate=48000, frame_time=0.04, tolerance_time=0.01):
+        self.speed = speed
+        # The frames overlap by half: the synthesis hop is a half of the frame.
+        self.hop = int(samplerate * frame_time) // 2
+        self.frame = 2 * self.hop
+        self.tolerance = int(samplerate * tolerance_time)
+        # The periodic Hann window, its halves overlapped by a hop sum to 1.
+        self.window = np.hanning(self.frame + 1)[:-1].astype(np.float32)
+
+        # The input from the absolute position "offset", it starts with the silence of the
+        # tolerance, so the first frames can be shifted back too.
+        self.input = np.zeros(self.tolerance, dtype=np.float32)
+        self.offset = 0
+        # The absolute position of the next frame before the shift.
+        self.position = float(self.tolerance)
+        # The absolute position of the natural continuation of the previous frame.
+        self.natural = None
+        # The second half of the previous frame, it is added to the next one.
+        self.tail = np.zeros(self.hop, dtype=np.float32)
+
+        self.input_length = 0
+        self.output_length = 0
+
+    def process(self, block):
+        """Add the input block, return the output that is ready."""
+        block = np.asarray(block, dtype=np.float32)
+        if self.speed == 1:
+            return block
+
+        self.input = np.concatenate((self.input, block))
+        self.input_length += len(block)
+
+        output = []
+        while self._ready():
+            output.append(self._step())
+
+        # Drop the input that no frame can use anymore.
+        keep = int(self.position) - self.tolerance
+        if self.natural is not None:
+            keep = min(keep, self.natural)
+        if keep > self.offset:
+            self.input = self.input[keep - self.offset:]
+            self.offset = keep
+
+        return self._output(output)
+
+    def flush(self):
+        """Return the rest of the output at the end of the audio string."""
+        if self.speed == 1:
+            return np.zeros(0, dtype=np.float32)
+
+        end = self.tolerance + self.input_length
+        self.input = np.concatenate(
+            (self.input, np.zeros(self.frame + 2 * self.tolerance, dtype=np.float32))
+        )
+
+        output = []
+        while self.position < end and self._ready():
+            output.append(self._step())
+        output.append(self.tail)
+
+        # Cut the output to the exact length of the stretched input.
+        length = int(round(self.input_length / self.speed)) - self.output_length
+        output = np.concatenate(output)[:max(length, 0)]
+        self.output_length += len(output)
+
+        return output
+
+    def _ready(self):
+        """Check that the input is long enough for the next frame."""
+        end = int(self.position) + self.tolerance + self.frame
+        if self.natural is not None:
+            end = max(end, self.natural + self.frame)
+
+        return end <= self.offset + len(self.input)
+
+    def _step(self):
+        start = int(self.position) - self.offset
+        if self.natural is not None:
+            # The shift with the highest cross-correlation with the natural continuation.
+            natural = self.natural - self.offset
+            template = self.input[natural:natural + self.hop]
+            region = self.input[start - self.tolerance:start + self.tolerance + self.hop]
+            correlation = sliding_window_view(region, self.hop) @ template
+            start += int(np.argmax(correlation)) - self.tolerance
+
+        frame = self.input[start:start + self.frame] * self.window
+        output = self.tail + frame[:self.hop]
+        self.tail = frame[self.hop:]
+
+        self.natural = self.offset + start + self.hop
+        self.position += self.hop * self.speed
+
+        return output
+
+    def _output(self, output):
+        if not output:
+            return np.zeros(0, dtype=np.float32)
+
+        output = np.concatenate(output)
+        self.output_length += len(output)
+
+        return output
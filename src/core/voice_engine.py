@@ -3,32 +3,133 @@
 English version.
 """
 import os
-import torch
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 
-__all__ = ["text_to_speech", "get_settings", "set_settings"]
+__all__ = [
+    "text_to_speech", "text_to_speech_batch", "get_settings", "set_settings", "get_voice_id",
+    "load_voice"
+]
 
 
-device = torch.device("cpu")
-torch.set_num_threads(os.cpu_count())
+# The torch import takes seconds, it is imported with the first model, so the window
+# is shown without waiting for it.
+torch = None
+device = "cpu"
 
-# 8000, 24000, 48000
+# 8000, 24000, 48000: the lower rates are cheaper for the model, the audio is resampled
+# to the output rate. It is set by the "sample_rate" setting.
 SAMPLE_RATE = 48000
-speaker, model = None, None
+# Load the model on the first synthesis instead of the "set_settings" call.
+LAZY_LOADING = True
+# The longest sentence (in characters) and the total length of a batch of short sentences,
+# the number of sentences of a batch voiced in parallel.
+BATCH_SENTENCE_LENGTH = 100
+BATCH_LENGTH = 500
+BATCH_WORKERS = min(4, os.cpu_count())
+speaker, voice_model = None, None
+# Each model package is loaded once and stays in memory: {voice_model: model}.
+models = {}
+models_lock = threading.Lock()
+
+
+def import_torch():
+    """Import torch on the first request."""
+    global torch
+    
+    if torch is None:
+        import torch as module
+        module.set_num_threads(os.cpu_count())
+        torch = module
+    
+    return torch
+
+
+def load_model(path):
+    """Return the model from the package, load it only on the first request."""
+    with models_lock:
+        import_torch()
+        if path not in models:
+            model = torch.package.PackageImporter(path).load_pickle("tts_models", "model")
+            model.to(device)
+            models[path] = model
+    
+    return models[path]
 
 
 def text_to_speech(sentence):
     """Generate the audio string from a text string."""
+    model = load_model(voice_model)
+    
     return model.apply_tts(text=sentence, speaker=speaker, sample_rate=SAMPLE_RATE)
 
 
+def text_to_speech_batch(sentences):
+    """Generate the audio strings for a list of text strings, in the same order.
+    
+    The sentences are grouped by length. A long sentence is voiced alone with all CPU threads.
+    Short sentences don't load all the cores, so a group of them is voiced in parallel
+    with the threads split between the sentences.
+    """
+    model = load_model(voice_model)
+    
+    def voice(i):
+        # The gradient mode is thread-local.
+        with torch.no_grad():
+            return model.apply_tts(text=sentences[i], speaker=speaker, sample_rate=SAMPLE_RATE)
+    
+    batches = []
+    batch, batch_length = [], 0
+    for i in sorted(range(len(sentences)), key=lambda i: len(sentences[i])):
+        if batch and (len(sentences[i]) > BATCH_SENTENCE_LENGTH
+                      or batch_length + len(sentences[i]) > BATCH_LENGTH):
+            batches.append(batch)
+            batch, batch_length = [], 0
+        batch.append(i)
+        batch_length += len(sentences[i])
+    if batch:
+        batches.append(batch)
+    
+    audio_list = [None] * len(sentences)
+    threads = torch.get_num_threads()
+    with ThreadPoolExecutor(BATCH_WORKERS) as executor:
+        for batch in batches:
+            if len(batch) == 1 or BATCH_WORKERS == 1:
+                for i in batch:
+                    audio_list[i] = voice(i)
+                continue
+            
+            torch.set_num_threads(max(1, threads // BATCH_WORKERS))
+            try:
+                for i, audio in zip(batch, executor.map(voice, batch)):
+                    audio_list[i] = audio
+            finally:
+                torch.set_num_threads(threads)
+    
+    return audio_list
+
+
+def load_voice():
+    """Load torch and the model of the current settings ahead of the first sentence."""
+    load_model(voice_model)
+
+
+def get_voice_id():
+    """Identify the current voice: the same text and voice id always give the same audio."""
+    model_stat = os.stat(voice_model)
+    
+    return f"{voice_model}:{model_stat.st_size}:{model_stat.st_mtime_ns}:{speaker}:{SAMPLE_RATE}"
+
+
 def get_settings():
     """Send the settings to display on the settings window."""
     speaker_list = []
     for i in range(0, 118):
         speaker_list.append("Speaker: en_"+str(i))
+    sample_rate_list = ["Sample rate: 48000", "Sample rate: 24000", "Sample rate: 8000"]
     
-    return {"speaker": speaker_list}
+    return {"speaker": speaker_list, "sample_rate": sample_rate_list}
 
 
 def set_settings(parameter, value, core_dir):
@@ -39,10 +140,14 @@ def set_settings(parameter, value, core_dir):
             
             # Cut the "Speaker: ".
             speaker = value[9:]
-    global model
-
-    model = torch.package.PackageImporter(str(core_dir) + "/" +"v3_en.pt").load_pickle(
-        "tts_models",
-        "model"
-    )
-    model.to(device)
\ No newline at end of file
+        case "sample_rate":
+            global SAMPLE_RATE
+            
+            # Cut the "Sample rate: ".
+            SAMPLE_RATE = int(value[13:])
+    global voice_model
+    
+    # A speaker change is a parameter swap, the model is loaded once.
+    voice_model = str(core_dir) + "/" + "v3_en.pt"
+    if not LAZY_LOADING:
+        load_model(voice_model)
\ No newline at end of file
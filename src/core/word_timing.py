@@ -0,0 +1,62 @@
+"""The approximate time of each word in the voiced sentence.
+
+The Silero models don't return the alignment of the text and the audio, so the audio length
+is shared between the words of the sentence by an estimate of their durations: the number
+of letters the voice engine pronounces (numbers and latin words are counted after the
+preprocessing) plus pauses after punctuation.
+"""
+import re
+
+import numpy as np
+
+from src.core import preprocessing as default_preprocessing
+
+
+__all__ = ["WordTimings", "estimate_word_timings"]
+
+
+WORD_PATTERN = re.compile(r"\S+")
+# The pause after a word in letters, by its last character.
+PAUSES = {",": 2, ";": 3, ":": 3, "—": 3, "–": 3, ".": 5, "!": 5, "?": 5, "…": 5}
+
+
+class WordTimings:
+    """The words of a sentence: character spans in the sentence and start times in samples."""
+    def __init__(self, starts, ends, times):
+        self.starts = starts
+        self.ends = ends
+        self.times = times
+
+    def __len__(self):
+        return len(self.starts)
+
+    def word_at(self, sample):
+        """Return the index of the word spoken at the sample or -1 before the first one."""
+        return int(np.searchsorted(self.times, sample, side="right")) - 1
+
+    def span(self, word):
+        """Return the (start, end) characters of the word in the sentence."""
+        return int(self.starts[word]), int(self.ends[word])
+
+
+def estimate_word_timings(sentence, length, preprocessing=default_preprocessing):
+    """Estimate the start of each word of the sentence in the audio string of "length" samples.
+
+    "preprocessing" is the module of the sentence language.
+    """
+    spans = [match.span() for match in WORD_PATTERN.finditer(sentence)]
+    if not spans:
+        return WordTimings(*(np.zeros(0, dtype=np.int64) for _ in range(3)))
+
+    weights = np.empty(len(spans))
+    for i, (start, end) in enumerate(spans):
+        word = sentence[start:end]
+        # This "prepare_sentence" function is from the "preprocessing" module.
+        letters = sum(c.isalnum() for c in preprocessing.prepare_sentence(word))
+        weights[i] = max(letters, 1) + PAUSES.get(word[-1], 0)
+
+    # Each word starts where the previous words end.
+    times = np.concatenate(([0.0], np.cumsum(weights)[:-1])) / weights.sum() * length
+    starts, ends = np.array(spans, dtype=np.int64).T
+
+    return WordTimings(starts, ends, times.astype(np.int64))
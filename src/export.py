@@ -0,0 +1,268 @@
+"""Export a book to audio files without the real-time playback.
+
+Usage: python -m src.export "Book name" [--format wav|flac|opus] [--workers N] [--output DIR]
+
+The sentences are voiced by a process pool, every worker has its own model copy.
+The voiced sentences are kept in the "<output>/<book>/sentences" folder,
+so an interrupted export continues from where it has stopped.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+import wave
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+from pathlib import Path
+
+import numpy as np
+
+from src.app_config import AppConfig
+from src.core.audio_cache import AudioCache
+from src.core.book import open_book
+from src.core.formats import chapter_sentences, extract_book, find_book
+from src.core.languages import get_language
+from src.core.prepared_book import PreparedBook
+
+
+# The pause between sentences in seconds.
+PAUSE = 0.3
+# A sentence with a line starting with it begins a new chapter.
+CHAPTER_PATTERN = re.compile(r"^\s*(chapter|глава)\b", re.IGNORECASE | re.MULTILINE)
+# Shorter chapters (e.g. a table of contents) are joined with the next one.
+MIN_CHAPTER = 20
+FORMATS = {"wav": ".wav", "flac": ".flac", "opus": ".opus"}
+# The number of sentences sent to a worker at once, they are voiced by batches.
+TASK_SIZE = 16
+
+# The state of a worker process.
+worker_cache = None
+worker_engine = None
+
+
+def init_worker(language, book_settings, core_dir, sentences_dir, threads):
+    """Prepare the model copy of a worker process."""
+    global worker_cache, worker_engine
+
+    voice_engine = worker_engine = get_language(language).voice_engine
+    voice_engine.import_torch().set_num_threads(threads)
+    # The workers split the CPU already, a batch is voiced in one thread of the worker.
+    voice_engine.BATCH_WORKERS = 1
+    for parameter, value in book_settings.items():
+        voice_engine.set_settings(parameter, value, core_dir)
+    worker_cache = AudioCache(sentences_dir, sys.maxsize)
+
+
+def voice_sentences(tasks):
+    """Voice the list of (index, prepared sentence) in a worker process, return its length."""
+    start = time.perf_counter()
+    audio_list = worker_engine.text_to_speech_batch([sentence for i, sentence in tasks])
+    synthesis_time = (time.perf_counter() - start) / len(tasks)
+
+    voice_id = worker_engine.get_voice_id()
+    for (i, sentence), audio in zip(tasks, audio_list):
+        worker_cache.put(worker_cache.key(sentence, voice_id), audio, synthesis_time)
+
+    return len(tasks)
+
+
+def load_book_settings(config, book):
+    """Return the language pack of the book and its voice engine settings.
+
+    The defaults are used for missing values and the values of another language.
+    """
+    book_settings = config.LIBRARY.load(book)
+    language = get_language(book_settings.get("language"))
+
+    settings = {}
+    for parameter, values in language.voice_engine.get_settings().items():
+        value = book_settings.get(parameter)
+        settings[parameter] = value if value in values else values[0]
+
+    return language, settings
+
+
+def split_chapters(book):
+    """Return the indexes of the first sentences of chapters."""
+    headings = [i for i, sentence in enumerate(book) if CHAPTER_PATTERN.search(sentence)]
+
+    chapters = []
+    for i, heading in enumerate(headings):
+        if i + 1 == len(headings) or headings[i + 1] - heading >= MIN_CHAPTER:
+            chapters.append(heading)
+    if not chapters or chapters[0] != 0:
+        # The text before the first chapter (or the whole book) is a chapter too.
+        chapters.insert(0, 0)
+
+    return chapters
+
+
+def load_voice_id(path):
+    """Return the voice id of the chapter files from the index, None if it is unknown."""
+    try:
+        with path.open(encoding="utf-8") as file:
+            return json.load(file).get("voice_id")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def write_audio(path, audio, sample_rate):
+    pcm = (np.clip(audio, -1, 1) * 32767).astype(np.int16)
+    temp = path.with_name(path.name + ".part")
+
+    if path.suffix == ".wav":
+        with wave.open(str(temp), "wb") as file:
+            file.setnchannels(1)
+            file.setsampwidth(2)
+            file.setframerate(sample_rate)
+            file.writeframes(pcm.tobytes())
+    else:
+        # The optional dependency, it is only needed for the compressed formats.
+        try:
+            import soundfile
+        except ImportError:
+            raise SystemExit("The 'soundfile' package is required for the FLAC and Opus export.")
+
+        if path.suffix == ".flac":
+            soundfile.write(str(temp), pcm, sample_rate, format="FLAC")
+        else:
+            soundfile.write(str(temp), pcm, sample_rate, format="OGG", subtype="OPUS")
+
+    # A chapter file exists only when it is complete.
+    os.replace(temp, path)
+
+
+def export(book, audio_format="wav", workers=None, output_dir=None):
+    config = AppConfig()
+
+    from nltk.data import path
+    path.append(str(config.NLTK_DATA_DIR))
+
+    language, book_settings = load_book_settings(config, book)
+    voice_engine = language.voice_engine
+
+    book_path = find_book(config.BOOKS_DIR, book)
+    if book_path is None:
+        raise SystemExit(f"The book '{book}' was not found in the 'books' folder.")
+    text_path, book_chapters = extract_book(book_path, config.CONFIG_DIR / "books")
+    sentences = open_book(
+        text_path,
+        config.CONFIG_DIR / "books" / f"{book}.idx",
+        language.preprocessing
+    )
+    prepared_book = PreparedBook(
+        sentences,
+        config.CONFIG_DIR / "books" / f"{book}.prep",
+        language.preprocessing
+    )
+    prepared_book.prepare_all()
+
+    for parameter, value in book_settings.items():
+        voice_engine.set_settings(parameter, value, config.CORE_DIR)
+    sample_rate = voice_engine.SAMPLE_RATE
+
+    book_dir = Path(output_dir or config.BASE_DIR / "export") / book
+    sentences_dir = book_dir / "sentences"
+    cache = AudioCache(sentences_dir, sys.maxsize)
+
+    # This "get_voice_id" function is from the "voice_engine" module.
+    voice_id = voice_engine.get_voice_id()
+    # The key of every readable sentence, None for unreadable ones.
+    keys = []
+    for i, sentence in enumerate(prepared_book):
+        if prepared_book.is_readable(i):
+            keys.append((cache.key(sentence, voice_id), sentence))
+        else:
+            keys.append(None)
+
+    tasks = [
+        (i, key[1])
+        for i, key in enumerate(keys)
+        if key is not None and key[0] + ".npy" not in cache.entries
+    ]
+    print(f"{book}: {len(sentences)} sentences, {len(tasks)} to voice.")
+
+    # Split the CPU between workers instead of letting every model use all cores.
+    workers = workers or max(1, (os.cpu_count() or 1) // 2)
+    threads = max(1, (os.cpu_count() or 1) // workers)
+
+    start = time.perf_counter()
+    if tasks:
+        with ProcessPoolExecutor(
+            workers,
+            mp_context=get_context("spawn"),
+            initializer=init_worker,
+            initargs=(language.name, book_settings, config.CORE_DIR, sentences_dir, threads),
+        ) as executor:
+            futures = [
+                executor.submit(voice_sentences, tasks[i:i+TASK_SIZE])
+                for i in range(0, len(tasks), TASK_SIZE)
+            ]
+            done = 0
+            for future in as_completed(futures):
+                done += future.result()
+                speed = done / (time.perf_counter() - start)
+                print(f"{done}/{len(tasks)} sentences, {speed:.2f} sentences/sec.")
+
+    # Join the sentences into chapter files and build the index.
+    # The cache is opened again to see the files written by the workers.
+    cache = AudioCache(sentences_dir, sys.maxsize)
+    index = []
+    # The chapter files of another voice (or of an unknown one) are written again.
+    rewrite = load_voice_id(book_dir / "index.json") != voice_id
+    # The chapters of EPUB and FB2 books are known, they are guessed in ".txt" books.
+    chapters = sorted({0, *(first for title, first in chapter_sentences(sentences, book_chapters))})
+    if len(chapters) == 1:
+        chapters = split_chapters(sentences)
+    chapters += [len(sentences)]
+    pause = np.zeros(int(PAUSE * sample_rate), dtype=np.float32)
+    for number, (first, last) in enumerate(zip(chapters, chapters[1:]), 1):
+        path = book_dir / f"{number:03}{FORMATS[audio_format]}"
+
+        parts = []
+        position = 0
+        for i in range(first, last):
+            if keys[i] is None:
+                continue
+
+            audio = cache.get(keys[i][0])
+            if audio is None:
+                raise SystemExit(
+                    f"The audio of the sentence {i} is missing, run the export again to voice it."
+                )
+            index.append({
+                "sentence": i,
+                "file": path.name,
+                "start": position / sample_rate,
+                "end": (position + len(audio)) / sample_rate,
+            })
+            parts += [audio, pause]
+            position += len(audio) + len(pause)
+
+        if parts and (rewrite or not path.exists()):
+            write_audio(path, np.concatenate(parts), sample_rate)
+
+    with (book_dir / "index.json").open("w", encoding="utf-8") as file:
+        json.dump({"voice_id": voice_id, "sentences": index}, file, ensure_ascii=False, indent=1)
+    prepared_book.close()
+    sentences.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"Done in {elapsed:.1f} s: {len(chapters) - 1} chapters in {book_dir}.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a book to audio files.")
+    parser.add_argument("book", help="the book name from the 'books' folder, without the extension")
+    parser.add_argument("--format", choices=FORMATS, default="wav")
+    parser.add_argument("--workers", type=int, help="the number of worker processes")
+    parser.add_argument("--output", help="the output folder, 'src/export' by default")
+    args = parser.parse_args()
+
+    export(args.book, args.format, args.workers, args.output)
+
+
+if __name__ == "__main__":
+    main()
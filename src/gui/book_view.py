@@ -0,0 +1,84 @@
+from PySide6.QtWidgets import QListView
+from PySide6.QtGui import QColor
+from PySide6.QtCore import QAbstractListModel, QModelIndex, Qt, Signal, Slot
+
+
+class BookModel(QAbstractListModel):
+    """The list model over the sentences of the whole book.
+
+    A row is a sentence. The sentences are read from the book only when the view asks for
+    them, i.e. for the visible rows.
+    """
+    def __init__(self):
+        super().__init__()
+        self.book = None
+        self.current_sentence = None
+        self.highlight = QColor("#555555")
+
+    def set_book(self, book, current_sentence):
+        self.beginResetModel()
+        self.book = book
+        self.current_sentence = current_sentence
+        self.endResetModel()
+
+    def set_current_sentence(self, current_sentence):
+        previous = self.current_sentence
+        self.current_sentence = current_sentence
+        for row in (previous, current_sentence):
+            if row is not None and row < self.rowCount():
+                self.dataChanged.emit(self.index(row), self.index(row), [Qt.BackgroundRole])
+
+    def set_highlight(self, color):
+        self.highlight = QColor(color)
+        self.set_current_sentence(self.current_sentence)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid() or self.book is None:
+            return 0
+
+        return len(self.book)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+
+        match role:
+            case Qt.DisplayRole:
+                # One line per sentence, so all the rows have the same height.
+                return f"{index.row()}: " + " ".join(self.book[index.row()].split())
+            case Qt.ToolTipRole:
+                return self.book[index.row()]
+            case Qt.BackgroundRole:
+                if index.row() == self.current_sentence:
+                    return self.highlight
+
+        return None
+
+
+class BookView(QListView):
+    """The whole book, a click on a sentence starts the reading from it."""
+    sentence_clicked = Signal(int)
+
+    def __init__(self):
+        super().__init__()
+        self.book_model = BookModel()
+        self.setModel(self.book_model)
+        # The view doesn't measure every row of the book to lay them out.
+        self.setUniformItemSizes(True)
+        self.setWordWrap(False)
+        self.setTextElideMode(Qt.ElideRight)
+        self.clicked.connect(self.row_clicked)
+
+    def show_sentence(self, book, index):
+        """Highlight the sentence of the book and scroll to it."""
+        if book is not self.book_model.book:
+            self.book_model.set_book(book, index)
+        else:
+            self.book_model.set_current_sentence(index)
+
+        if index < self.book_model.rowCount():
+            self.scrollTo(self.book_model.index(index), QListView.EnsureVisible)
+
+    @Slot()
+    def row_clicked(self, index):
+        self.sentence_clicked.emit(index.row())
@@ -1,9 +1,12 @@
-from PySide6.QtWidgets import QWidget, QPlainTextEdit, QPushButton, QHBoxLayout, QBoxLayout
-from PySide6.QtGui import QIcon, QTextCursor
-from PySide6.QtCore import QSize, Qt, Slot, QThread
+from PySide6.QtWidgets import QWidget, QPushButton, QHBoxLayout, QBoxLayout, QLabel
+from PySide6.QtGui import QIcon
+from PySide6.QtCore import QSize, Qt, Slot, QThread, QTimer
 
 from src.gui.settings_widget import SettingsWidget
+from src.gui.text_view import TextView
+from src.gui.book_view import BookView
 from src.core.reader import Reader
+from src.core.metrics import metrics
 from src.gui.dialogs import QuickMessage
 
 
@@ -15,10 +18,15 @@ class MainWidget(QWidget):
         self.config = config
         self.load_settings()
         
+        # The timing of the hot paths and the status panel, see the "metrics" module.
+        metrics.enabled = self.config.settings.value("metrics", "false") == "true"
+        
         # It is a voice reader class.
         self.reader = Reader(self, config_reader)
         self.reader.reading_finished_signal.connect(self.reading_finished)
         self.reader.update_text_signal.connect(self.update_plain_text)
+        self.reader.word_signal.connect(self.update_word)
+        self.reader.voice_loaded_signal.connect(self.voice_loaded)
         
         self.thread = QThread()
         # Move to thread the certain func not the class.
@@ -51,9 +59,25 @@ class MainWidget(QWidget):
         self.settings_button.setStyleSheet("border: none;")
         self.settings_button.clicked.connect(self.settings_button_clicked)
         
-        self.text = QPlainTextEdit()
-        self.text.setReadOnly(True)
-        self.reader.update_plain_text()
+        # "recent sentences" (the last sentences up to the current one) or "whole book".
+        self.view = self.config.settings.value("view", "recent sentences")
+        self.text = TextView()
+        self.book_view = BookView()
+        self.book_view.sentence_clicked.connect(self.sentence_clicked)
+        self.set_view(self.view)
+        
+        # It is shown while torch and the model are loading in the background.
+        self.loading_label = QLabel("Loading voice...")
+        self.loading_label.setVisible(False)
+        # The number of the voice loads in progress.
+        self.voice_loads = 0
+        
+        self.status_panel = QLabel()
+        self.status_panel.setVisible(metrics.enabled)
+        self.status_timer = QTimer(self)
+        self.status_timer.timeout.connect(self.update_status_panel)
+        if metrics.enabled:
+            self.status_timer.start(1000)
         
         # To prevent capture space and arrow keys by widgets.
         # Thus these keys can be captured by "keyPressEvent".
@@ -62,6 +86,7 @@ class MainWidget(QWidget):
         self.next_button.setFocusPolicy(Qt.NoFocus)
         self.settings_button.setFocusPolicy(Qt.NoFocus)
         self.text.setFocusPolicy(Qt.NoFocus)
+        self.book_view.setFocusPolicy(Qt.NoFocus)
         
         self.setLayout(QBoxLayout(QBoxLayout.TopToBottom, self))
         
@@ -70,6 +95,7 @@ class MainWidget(QWidget):
         horizontal_layout.addWidget(self.previous_button)
         horizontal_layout.addWidget(self.next_button)
         horizontal_layout.addWidget(self.settings_button)
+        horizontal_layout.addWidget(self.loading_label)
         
         self.set_theme()
         
@@ -77,12 +103,90 @@ class MainWidget(QWidget):
         self.layout().setContentsMargins(0, 5, 0, 0)
         self.layout().addLayout(horizontal_layout)
         self.layout().addWidget(self.text)
+        self.layout().addWidget(self.book_view)
+        self.layout().addWidget(self.status_panel)
+        
+        # The voice is loaded after the window is shown.
+        QTimer.singleShot(0, self.load_voice)
+        if self.reader.book_error:
+            # Another book was opened instead.
+            QTimer.singleShot(0, self.show_book_error)
+    
+    @Slot()
+    def update_plain_text(self, current_sentence):
+        """Take the current sentence from the "Reader" and update the shown view."""
+        with metrics.timer("update_plain_text_ms"):
+            if self.view == "whole book":
+                self.book_view.show_sentence(self.reader.book, current_sentence)
+            else:
+                self.text.show_sentence(self.reader.book, current_sentence)
+    
+    @Slot()
+    def update_word(self, current_sentence, start, end):
+        """Highlight the spoken word, only the recent sentences view shows the words."""
+        if self.view != "whole book":
+            self.text.highlight_word(current_sentence, start, end)
+    
+    def set_view(self, view):
+        """Show the last sentences up to the current one or the whole book."""
+        self.view = view
+        self.text.setVisible(view != "whole book")
+        self.book_view.setVisible(view == "whole book")
+        self.reader.update_plain_text()
+    
+    @Slot()
+    def sentence_clicked(self, index):
+        """Start the reading from the sentence clicked in the whole book view."""
+        if self.thread.isRunning():
+            self.stop_reading()
+        
+        self.reader.current_sentence = index
+        self.reader.current_reading_position = False
+        self.reader.update_plain_text()
+        self.start_stop_button_clicked()
+    
+    def load_voice(self):
+        """Load the voice in the background, the reading can start meanwhile and waits for it."""
+        self.voice_loads += 1
+        self.loading_label.setText("Loading voice...")
+        self.loading_label.setVisible(True)
+        self.reader.load_voice()
+    
+    @Slot()
+    def show_book_error(self):
+        dialog = QuickMessage("Error", self.reader.book_error, self.config, self)
+        dialog.exec()
     
     @Slot()
-    def update_plain_text(self, content):
-        """Take the content from the "Reader" and update the plain text."""
-        self.text.setPlainText(content)
-        self.text.moveCursor(QTextCursor.End)
+    def voice_loaded(self, error):
+        self.voice_loads -= 1
+        if error:
+            self.loading_label.setText(error)
+        elif not self.voice_loads:
+            self.loading_label.setVisible(False)
+    
+    @Slot()
+    def update_status_panel(self):
+        """Show the p50/p90 of the hot paths, the queue depth and the audio underruns."""
+        summary = metrics.summary()
+        
+        def field(name, label, key="p50", unit="", digits=2):
+            if "p50" not in summary.get(name, {}):
+                return label + " -"
+            return f"{label} {summary[name][key]:.{digits}f}{unit}"
+        
+        cache = self.reader.audio_cache.stats()
+        self.status_panel.setText("   ".join((
+            field("text_to_speech_ms", "TTS p50", unit=" ms"),
+            field("text_to_speech_ms", "p90", "p90", " ms"),
+            field("real_time_factor", "RTF"),
+            field("prepare_sentence_ms", "prepare", unit=" ms"),
+            field("output_write_ms", "write p90", "p90", " ms"),
+            field("update_plain_text_ms", "text", unit=" ms"),
+            field("queue_depth", "queue", "last", digits=0),
+            f"underruns {self.reader.output.underruns}",
+            f"cache {cache['hits']}/{cache['hits'] + cache['misses']}",
+        )))
     
     @Slot()
     def start_stop_button_clicked(self):
@@ -159,12 +263,41 @@ class MainWidget(QWidget):
                 "color: " + self.config.theme_config.dark +
                 "; background-color: " + self.config.theme_config.light
             )
+            self.text.set_highlight(
+                self.config.theme_config.light_highlight,
+                self.config.theme_config.light_word_highlight
+            )
+            self.book_view.setStyleSheet(
+                "color: " + self.config.theme_config.dark +
+                "; background-color: " + self.config.theme_config.light
+            )
+            self.book_view.book_model.set_highlight(self.config.theme_config.light_highlight)
         elif self.config.theme_config.theme == "dark":
             self.setStyleSheet("background-color: "+self.config.theme_config.dark)
             self.text.setStyleSheet(
                 "color: " + self.config.theme_config.light +
                 "; background-color: " + self.config.theme_config.dark
             )
+            self.text.set_highlight(
+                self.config.theme_config.dark_highlight,
+                self.config.theme_config.dark_word_highlight
+            )
+            self.book_view.setStyleSheet(
+                "color: " + self.config.theme_config.light +
+                "; background-color: " + self.config.theme_config.dark
+            )
+            self.book_view.book_model.set_highlight(self.config.theme_config.dark_highlight)
+        
+        self.status_panel.setStyleSheet(
+            "font-size: 11px; color: " + (self.config.theme_config.light
+                                          if self.config.theme_config.theme == "dark"
+                                          else self.config.theme_config.dark)
+        )
+        self.loading_label.setStyleSheet(
+            "color: " + (self.config.theme_config.light
+                         if self.config.theme_config.theme == "dark"
+                         else self.config.theme_config.dark)
+        )
         
         self.setWindowIcon(
             QIcon(str(self.config.icons_dir / self.config.theme_config.theme / "headphones.ico"))
@@ -206,6 +339,12 @@ class MainWidget(QWidget):
         self.config.settings.setValue("main_window_position",  self.pos())
         self.config.settings.setValue("main_window_size",  self.size())
     
+    def save_metrics(self):
+        """Export the trace of the session to the "metrics" folder."""
+        self.config.metrics_dir.mkdir(exist_ok=True)
+        metrics.export_csv(self.config.metrics_dir / "trace.csv")
+        metrics.export_json(self.config.metrics_dir / "trace.json")
+    
     def closeEvent(self, event=None):
         if self.thread.isRunning():
             self.stop_reading()
@@ -218,7 +357,14 @@ class MainWidget(QWidget):
         self.save_settings()
         
         # Close the "OutputStream" of the sounddevice.
-        self.reader.stream.close()
+        self.reader.output.close()
+        self.reader.synthesis_queue.close()
+        # Write the queued reading position and settings.
+        self.reader.config.library.flush()
+        
+        if metrics.enabled:
+            self.status_timer.stop()
+            self.save_metrics()
         
         # Let the window close.
         event.accept()
\ No newline at end of file
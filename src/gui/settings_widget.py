@@ -1,8 +1,17 @@
-from PySide6.QtWidgets import QWidget, QLayout, QBoxLayout, QComboBox, QSpinBox
-from PySide6.QtCore import Slot, QSettings
+from bisect import bisect_right
+
+from PySide6.QtWidgets import QWidget, QLayout, QBoxLayout, QComboBox, QSpinBox, QLineEdit
+from PySide6.QtCore import Qt, Slot
 from PySide6.QtGui import QIcon
 
-from src.core.voice_engine import get_settings, set_settings
+from src.core.languages import available_languages, get_language
+from src.gui.dialogs import QuickMessage
+
+
+# The playback speeds, the pitch of the voice stays the same.
+SPEEDS = [0.75, 1.0, 1.25, 1.5, 1.75, 2.0]
+# The number of books in the "Book" field, the search finds the others.
+BOOK_LIST_SIZE = 50
 
 
 class SettingsWidget(QWidget):
@@ -18,34 +27,47 @@ class SettingsWidget(QWidget):
         # The widget's size will not be resizable by the user, and will automatically shrink.
         self.layout().setSizeConstraint(QLayout.SetFixedSize)
         
-        # "Book" field.
+        # "Search" field, it filters the "Book" field.
+        self.book_search = QLineEdit()
+        self.book_search.setPlaceholderText("Search books")
+        self.book_search.setClearButtonEnabled(True)
+        
+        self.book_search.textChanged.connect(self.update_book_list)
+        self.layout().addWidget(self.book_search)
+        
+        # "Book" field: the last read books first.
         self.current_book = QComboBox()
-        config_list = [f.stem for f in (self.config.config_dir / "books").glob("*.ini")]
-        for c in config_list:
-            self.current_book.addItem("Book: "+c)
-        index = self.current_book.findText("Book: "+self.main_widget.reader.current_book)
-        self.current_book.setCurrentIndex(index)
+        self.update_book_list()
         
-        self.current_book.currentTextChanged.connect(self.current_book_changed)
+        # Only a choice of the user changes the book, not a new list.
+        self.current_book.textActivated.connect(self.current_book_changed)
         self.layout().addWidget(self.current_book)
         
-        # Fields from voice engine.
-        # This "get_settings" function is from the "voice_engine" module.
-        self.combobox_dict = get_settings()
-        for c in self.combobox_dict:
-            temp = self.combobox_dict[c]
-            self.combobox_dict[c] = QComboBox()
-            self.combobox_dict[c].addItems(temp)
-            
-            # Load the value from book settings.
-            temp = self.load_book_settings(c)
-            index = self.combobox_dict[c].findText(temp)
-            self.combobox_dict[c].setCurrentIndex(index)
-            # This "set_settings" function is from the "voice_engine" module.
-            set_settings(c, temp, self.config.core_dir)
-            
-            self.layout().addWidget(self.combobox_dict[c])
-            self.combobox_dict[c].currentTextChanged.connect(self.combobox_dict_changed)
+        # "Language" field.
+        self.language_combobox = QComboBox()
+        for language in available_languages():
+            self.language_combobox.addItem("Language: "+language)
+        index = self.language_combobox.findText(
+            "Language: "+self.main_widget.reader.language.name
+        )
+        self.language_combobox.setCurrentIndex(index)
+        
+        self.language_combobox.currentTextChanged.connect(self.language_combobox_changed)
+        self.layout().addWidget(self.language_combobox)
+        
+        # Fields from voice engine of the book language.
+        self.combobox_dict = {}
+        self.create_voice_fields()
+        
+        # "Speed" field, it is stored in the book settings by the "Reader".
+        self.speed_combobox = QComboBox()
+        self.speed_combobox.addItems([f"Speed: {speed:g}x" for speed in SPEEDS])
+        self.speed_combobox.setCurrentIndex(
+            self.speed_combobox.findText(f"Speed: {self.main_widget.reader.speed:g}x")
+        )
+        
+        self.speed_combobox.currentTextChanged.connect(self.speed_combobox_changed)
+        self.layout().addWidget(self.speed_combobox)
         
         # "Current sentence" field.
         # The "showEvent" method is responsible for the value "current_sentence".
@@ -58,39 +80,134 @@ class SettingsWidget(QWidget):
         self.current_sentence.valueChanged.connect(self.current_sentence_changed)
         self.layout().addWidget(self.current_sentence)
         
+        # "Chapter" field, it is hidden for books without chapters.
+        self.chapter_combobox = QComboBox()
+        self.update_chapter_list()
+        
+        self.chapter_combobox.activated.connect(self.chapter_combobox_activated)
+        self.layout().addWidget(self.chapter_combobox)
+        
         # "Theme" field.
         self.theme_combobox = QComboBox()
         self.theme_combobox.addItems(["Theme: light", "Theme: dark"])
         index = self.theme_combobox.findText("Theme: "+self.config.theme_config.theme)
         self.theme_combobox.setCurrentIndex(index)
         
-        self.set_theme()
-        
         self.theme_combobox.currentTextChanged.connect(self.theme_combobox_changed)
         self.layout().addWidget(self.theme_combobox)
         
+        # "View" field.
+        self.view_combobox = QComboBox()
+        self.view_combobox.addItems(["View: recent sentences", "View: whole book"])
+        index = self.view_combobox.findText(
+            "View: "+self.config.settings.value("view", "recent sentences")
+        )
+        self.view_combobox.setCurrentIndex(index)
+        
+        self.view_combobox.currentTextChanged.connect(self.view_combobox_changed)
+        self.layout().addWidget(self.view_combobox)
+        
+        self.set_theme()
+        
         self.layout().setContentsMargins(3, 3, 3, 3)
     
+    def create_voice_fields(self):
+        """Create the fields of the voice engine settings, replace the fields of another language."""
+        for c in self.combobox_dict:
+            self.layout().removeWidget(self.combobox_dict[c])
+            self.combobox_dict[c].deleteLater()
+        
+        voice_engine = self.main_widget.reader.language.voice_engine
+        # The fields follow the "Language" field.
+        position = self.layout().indexOf(self.language_combobox) + 1
+        
+        # This "get_settings" function is from the "voice_engine" module.
+        self.combobox_dict = voice_engine.get_settings()
+        for i, c in enumerate(self.combobox_dict):
+            temp = self.combobox_dict[c]
+            self.combobox_dict[c] = QComboBox()
+            self.combobox_dict[c].addItems(temp)
+            
+            # Load the value from book settings.
+            temp = self.load_book_settings(c)
+            index = self.combobox_dict[c].findText(temp)
+            self.combobox_dict[c].setCurrentIndex(index)
+            # This "set_settings" function is from the "voice_engine" module.
+            voice_engine.set_settings(c, temp, self.config.core_dir)
+            
+            self.layout().insertWidget(position + i, self.combobox_dict[c])
+            self.combobox_dict[c].currentTextChanged.connect(self.combobox_dict_changed)
+    
+    @Slot()
+    def update_book_list(self, search=""):
+        """Show the books found in the library, the current one is selected if it is found."""
+        self.current_book.clear()
+        for book in self.config.library.names(search, BOOK_LIST_SIZE):
+            self.current_book.addItem("Book: "+book)
+        index = self.current_book.findText("Book: "+self.main_widget.reader.current_book)
+        self.current_book.setCurrentIndex(index)
+    
     @Slot()
     def current_book_changed(self, text):
+        if text[6:] == self.main_widget.reader.current_book:
+            return
+        
         # Save settings of a previous book.
         self.save_book_settings()
         self.main_widget.reader.save_settings()
         
+        previous_book = self.main_widget.reader.current_book
         # Cut the "Book: ", set the new book.
         self.config.settings.setValue("current_book",  text[6:])
         
         # Load settings for a new book.
         self.main_widget.reader.current_reading_position = False
         self.main_widget.reader.load_settings()
-        self.main_widget.reader.load_book()
+        error = self.main_widget.reader.load_book()
+        if error:
+            # The previous book stays open.
+            self.config.settings.setValue("current_book", previous_book)
+            self.main_widget.reader.load_settings()
+            self.update_book_list(self.book_search.text())
+            
+            dialog = QuickMessage("Error", error, self.config, self)
+            dialog.exec()
+            
+            return
         self.main_widget.reader.update_plain_text()
         
-        for c in self.combobox_dict:
-            temp = self.load_book_settings(c)
-            index = self.combobox_dict[c].findText(temp)
-            self.combobox_dict[c].setCurrentIndex(index)
+        # The signal would load the book again.
+        self.language_combobox.blockSignals(True)
+        self.language_combobox.setCurrentIndex(self.language_combobox.findText(
+            "Language: "+self.main_widget.reader.language.name
+        ))
+        self.language_combobox.blockSignals(False)
+        self.create_voice_fields()
+        self.main_widget.load_voice()
+        self.set_theme()
         
+        self.speed_combobox.setCurrentIndex(
+            self.speed_combobox.findText(f"Speed: {self.main_widget.reader.speed:g}x")
+        )
+        
+        self.update_current_sentence_range()
+        self.update_chapter_list()
+        # The book is the last read one now.
+        self.update_book_list(self.book_search.text())
+    
+    def update_chapter_list(self):
+        chapters = self.main_widget.reader.chapters
+        self.chapter_combobox.clear()
+        self.chapter_combobox.addItems(["Chapter: "+title for title, first in chapters])
+        self.chapter_combobox.setVisible(bool(chapters))
+    
+    @Slot()
+    def chapter_combobox_activated(self, index):
+        """Move the reading to the first sentence of the chapter."""
+        # The "current_sentence_changed" slot moves the reading.
+        self.current_sentence.setValue(self.main_widget.reader.chapters[index][1])
+    
+    def update_current_sentence_range(self):
         temp = self.main_widget.reader.current_sentence
         self.current_sentence.setPrefix("Current sentence (0:"
                                         +str(len(self.main_widget.reader.book)-1)
@@ -98,6 +215,39 @@ class SettingsWidget(QWidget):
         self.current_sentence.setRange(0, len(self.main_widget.reader.book)-1)
         self.current_sentence.setValue(temp)
     
+    @Slot()
+    def language_combobox_changed(self, text):
+        """Set the language of the book: its sentences and voice engine."""
+        reader = self.main_widget.reader
+        previous_language = reader.language
+        # Cut the "Language: ".
+        reader.language = get_language(text[10:])
+        reader.current_reading_position = False
+        # The saved offset is in a sentence of the previous split.
+        reader.resume = reader.saved_position = None
+        error = reader.load_book()
+        if error:
+            # The book stays open in the previous language.
+            reader.language = previous_language
+            self.language_combobox.blockSignals(True)
+            self.language_combobox.setCurrentIndex(
+                self.language_combobox.findText("Language: "+previous_language.name)
+            )
+            self.language_combobox.blockSignals(False)
+            
+            dialog = QuickMessage("Error", error, self.config, self)
+            dialog.exec()
+            
+            return
+        reader.save_settings()
+        reader.update_plain_text()
+        
+        self.create_voice_fields()
+        self.main_widget.load_voice()
+        self.set_theme()
+        self.update_current_sentence_range()
+        self.update_chapter_list()
+    
     @Slot()
     def current_sentence_changed(self, value):
         self.main_widget.reader.current_sentence = value
@@ -110,9 +260,22 @@ class SettingsWidget(QWidget):
         for c in self.combobox_dict:
             if text == self.combobox_dict[c].currentText():
                 # This "set_settings" function is from the "voice_engine" module.
-                set_settings(c, text, self.config.core_dir)
+                self.main_widget.reader.language.voice_engine.set_settings(
+                    c, text, self.config.core_dir
+                )
+                self.config.library.save(self.main_widget.reader.current_book, **{c: text})
+                # The queued audio was voiced with the previous settings.
+                self.main_widget.reader.synthesis_queue.clear()
+                # Another voice model may be chosen.
+                self.main_widget.load_voice()
                 break
     
+    @Slot()
+    def speed_combobox_changed(self, text):
+        # Cut the "Speed: " and the "x".
+        self.main_widget.reader.speed = float(text[7:-1])
+        self.config.library.save(self.main_widget.reader.current_book, speed=text[7:-1])
+    
     @Slot()
     def theme_combobox_changed(self, text):
         self.config.settings.setValue("theme", text[7:])
@@ -120,19 +283,35 @@ class SettingsWidget(QWidget):
         self.main_widget.set_theme()
         self.set_theme()
     
+    @Slot()
+    def view_combobox_changed(self, text):
+        # Cut the "View: ".
+        self.config.settings.setValue("view", text[6:])
+        self.main_widget.set_view(text[6:])
+    
     def set_theme(self):
         if self.config.theme_config.theme == "light":
             self.setStyleSheet("background-color: "+self.config.theme_config.light)
+            self.book_search.setStyleSheet("color: "+self.config.theme_config.dark)
             self.current_book.setStyleSheet("color: "+self.config.theme_config.dark)
+            self.language_combobox.setStyleSheet("color: "+self.config.theme_config.dark)
             self.current_sentence.setStyleSheet("color: "+self.config.theme_config.dark)
+            self.chapter_combobox.setStyleSheet("color: "+self.config.theme_config.dark)
             self.theme_combobox.setStyleSheet("color: "+self.config.theme_config.dark)
+            self.speed_combobox.setStyleSheet("color: "+self.config.theme_config.dark)
+            self.view_combobox.setStyleSheet("color: "+self.config.theme_config.dark)
             for c in self.combobox_dict:
                 self.combobox_dict[c].setStyleSheet("color: "+self.config.theme_config.dark)
         elif self.config.theme_config.theme == "dark":
             self.setStyleSheet("background-color: "+self.config.theme_config.dark)
+            self.book_search.setStyleSheet("color: "+self.config.theme_config.light)
             self.current_book.setStyleSheet("color: "+self.config.theme_config.light)
+            self.language_combobox.setStyleSheet("color: "+self.config.theme_config.light)
             self.current_sentence.setStyleSheet("color: "+self.config.theme_config.light)
+            self.chapter_combobox.setStyleSheet("color: "+self.config.theme_config.light)
             self.theme_combobox.setStyleSheet("color: "+self.config.theme_config.light)
+            self.speed_combobox.setStyleSheet("color: "+self.config.theme_config.light)
+            self.view_combobox.setStyleSheet("color: "+self.config.theme_config.light)
             for c in self.combobox_dict:
                 self.combobox_dict[c].setStyleSheet("color: "+self.config.theme_config.light)
         
@@ -147,31 +326,32 @@ class SettingsWidget(QWidget):
     
     def load_book_settings(self, value):
         """Load settings from the settings store."""
-        book_settings = QSettings(
-            str(self.config.config_dir / "books" / f"{self.main_widget.reader.current_book}.ini"),
-            QSettings.IniFormat
-        )
+        book_settings = self.config.library.load(self.main_widget.reader.current_book)
         
-        temp = book_settings.value(value)
-        if temp == None:
-            # This "get_settings" function is from the "voice_engine" module.
-            temp = get_settings()[value][0]
+        # This "get_settings" function is from the "voice_engine" module.
+        values = self.main_widget.reader.language.voice_engine.get_settings()[value]
+        temp = book_settings.get(value)
+        # The value may be of another language of the book.
+        if temp not in values:
+            temp = values[0]
         
         return temp
     
     def save_book_settings(self):
         """Copy voice engine settings values to the book settings store."""
-        book_settings = QSettings(
-            str(self.config.config_dir / "books" / f"{self.main_widget.reader.current_book}.ini"),
-            QSettings.IniFormat
+        self.config.library.save(
+            self.main_widget.reader.current_book,
+            **{c: self.combobox_dict[c].currentText() for c in self.combobox_dict}
         )
-        
-        for c in self.combobox_dict:
-            book_settings.setValue(c, self.combobox_dict[c].currentText())
     
     def showEvent(self, event):
         # Center the "SettingsWidget" window on the main window.
         self.current_sentence.setValue(self.main_widget.reader.current_sentence)
+        # The chapter of the current sentence.
+        self.chapter_combobox.setCurrentIndex(bisect_right(
+            [first for title, first in self.main_widget.reader.chapters],
+            self.main_widget.reader.current_sentence
+        ) - 1)
         
         self.move(self.main_widget.geometry().x()
                   +(self.main_widget.geometry().width()-self.geometry().width())//2,
@@ -0,0 +1,162 @@
+from collections import deque
+from itertools import islice
+
+from PySide6.QtWidgets import QPlainTextEdit, QTextEdit
+from PySide6.QtGui import QTextCursor, QColor
+
+
+class TextView(QPlainTextEdit):
+    """The last sentences up to the current one, the current sentence is highlighted.
+
+    The document is changed incrementally: the next sentence is appended and the oldest one
+    is removed, the previous sentence removes the last one and prepends one more, so a step
+    costs the same for any book. The document is rebuilt only on jumps and book changes.
+    Each sentence takes the blocks "", "::index::" and its text lines.
+    """
+    def __init__(self, size=100):
+        super().__init__()
+        self.setReadOnly(True)
+        # The maximum number of sentences in the document.
+        self.size = size
+        self.book = None
+        # The shown sentences are [first, first + len(self.blocks)).
+        self.first = 0
+        # The number of blocks of each shown sentence.
+        self.blocks = deque()
+        self.highlight = QColor("#555555")
+        self.word_highlight = QColor("#777777")
+
+    def set_highlight(self, color, word_color):
+        self.highlight = QColor(color)
+        self.word_highlight = QColor(word_color)
+        self.highlight_sentence()
+
+    def show_sentence(self, book, index):
+        """Show the sentences of the book up to the index."""
+        last = self.first + len(self.blocks) - 1
+        if book is not self.book or not self.blocks:
+            self.rebuild(book, index)
+        elif index == last + 1:
+            self.append_sentence(index)
+            if len(self.blocks) > self.size:
+                self.remove_first()
+        elif index == last - 1:
+            self.remove_last()
+            if self.first > 0:
+                self.prepend_sentence(self.first - 1)
+        elif index != last:
+            self.rebuild(book, index)
+
+        self.highlight_sentence()
+        self.scroll_to(index)
+
+    def rebuild(self, book, index):
+        self.book = book
+        self.first = max(0, index - self.size + 1)
+        self.blocks.clear()
+
+        parts = []
+        for i in range(self.first, index + 1):
+            text = self.format_sentence(i)
+            parts.append(text)
+            self.blocks.append(text.count("\n") + 1)
+
+        self.setPlainText("\n".join(parts))
+
+    def format_sentence(self, index):
+        return "\n::" + str(index) + "::\n" + self.book[index]
+
+    def append_sentence(self, index):
+        text = self.format_sentence(index)
+        cursor = QTextCursor(self.document())
+        cursor.movePosition(QTextCursor.End)
+        cursor.insertText("\n" + text)
+        self.blocks.append(text.count("\n") + 1)
+
+    def prepend_sentence(self, index):
+        text = self.format_sentence(index)
+        cursor = QTextCursor(self.document())
+        cursor.insertText(text + "\n")
+        self.blocks.appendleft(text.count("\n") + 1)
+        self.first -= 1
+
+    def remove_first(self):
+        cursor = QTextCursor(self.document())
+        # Up to the first block of the next sentence.
+        end = self.document().findBlockByNumber(self.blocks.popleft()).position()
+        cursor.setPosition(end, QTextCursor.KeepAnchor)
+        cursor.removeSelectedText()
+        self.first += 1
+
+    def remove_last(self):
+        count = self.blocks.pop()
+        cursor = QTextCursor(self.document())
+        cursor.movePosition(QTextCursor.End)
+        if self.blocks:
+            # From the end of the last block of the previous sentence.
+            start = self.document().findBlockByNumber(
+                self.document().blockCount() - count
+            ).position() - 1
+            cursor.setPosition(start, QTextCursor.KeepAnchor)
+        else:
+            cursor.movePosition(QTextCursor.Start, QTextCursor.KeepAnchor)
+        cursor.removeSelectedText()
+
+    def sentence_cursor(self, index):
+        """Return the cursor that selects the shown sentence."""
+        if index == self.first + len(self.blocks) - 1:
+            number = self.document().blockCount() - self.blocks[-1]
+        else:
+            number = sum(islice(self.blocks, index - self.first))
+        # Skip the empty block before the "::index::" line.
+        start = self.document().findBlockByNumber(number + 1)
+        end = self.document().findBlockByNumber(number + self.blocks[index - self.first] - 1)
+
+        cursor = QTextCursor(start)
+        cursor.setPosition(end.position() + end.length() - 1, QTextCursor.KeepAnchor)
+
+        return cursor
+
+    def highlight_sentence(self):
+        """Highlight the last shown sentence, it is the current one."""
+        if not self.blocks:
+            self.setExtraSelections([])
+            return
+
+        selection = QTextEdit.ExtraSelection()
+        selection.format.setBackground(self.highlight)
+        selection.cursor = self.sentence_cursor(self.first + len(self.blocks) - 1)
+        self.setExtraSelections([selection])
+
+    def highlight_word(self, index, start, end):
+        """Highlight the characters [start, end) of the current sentence."""
+        if not self.blocks or index != self.first + len(self.blocks) - 1:
+            return
+
+        sentence = self.sentence_cursor(index)
+        # The sentence text follows the "::index::" line.
+        text_start = self.document().findBlock(sentence.selectionStart()).next().position()
+
+        word = QTextEdit.ExtraSelection()
+        word.format.setBackground(self.word_highlight)
+        word.cursor = QTextCursor(self.document())
+        word.cursor.setPosition(text_start + start)
+        word.cursor.setPosition(text_start + end, QTextCursor.KeepAnchor)
+
+        selections = self.extraSelections()[:1]
+        self.setExtraSelections(selections + [word])
+
+    def scroll_to(self, index):
+        """Scroll to the shown sentence, the document isn't changed."""
+        if not self.first <= index < self.first + len(self.blocks):
+            return
+
+        sentence = self.sentence_cursor(index)
+        # Show the whole sentence: its end first, then its beginning.
+        cursor = QTextCursor(self.document())
+        cursor.setPosition(sentence.selectionEnd())
+        self.setTextCursor(cursor)
+        self.ensureCursorVisible()
+        cursor.setPosition(sentence.selectionStart())
+        self.setTextCursor(cursor)
+        self.ensureCursorVisible()
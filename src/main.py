@@ -1,9 +1,14 @@
 import sys
+import time
+
 from PySide6.QtWidgets import QApplication
 
 from src.app_config import AppConfig
 from src.utils.check_files import check_files
 from src.gui.main_widget import MainWidget
+from src.gui.dialogs import QuickMessage
+from src.core.reader import BookError
+from src.core.metrics import metrics
 
 
 def main():
@@ -11,11 +16,23 @@ def main():
 
     app = QApplication([])
 
+    start = time.perf_counter()
     if check_files(config.check_files):
+        check_time = time.perf_counter() - start
+        
         from nltk.data import path
         path.append(config.NLTK_DATA_DIR)
 
-        main_widget = MainWidget(config.main_window, config.reader, config.settings_widget)
+        try:
+            main_widget = MainWidget(config.main_window, config.reader, config.settings_widget)
+        except BookError as e:
+            dialog = QuickMessage("File Check", str(e), config.check_files)
+            dialog.exec()
+            app.quit()
+            
+            return
+        # The metrics are enabled by the "MainWidget" settings.
+        metrics.record("check_files_ms", check_time * 1000)
         main_widget.show()
         
         sys.exit(app.exec())
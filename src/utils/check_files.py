@@ -1,85 +1,154 @@
+import json
 import os
+import time
 
+from PySide6.QtCore import QSettings
+
+from src.core.formats import book_suffixes
 from src.gui.dialogs import QuickMessage
 
 
+ICONS = {"headphones.ico", "next.ico", "pause.ico", "play.ico", "previous.ico", "settings.ico"}
+# The snapshot of the "books" folder: the library is reconciled only when it has changed.
+MANIFEST = "manifest.json"
+# A folder changed in the last seconds may change again without a new mtime
+# (the mtime resolution of some file systems), its snapshot isn't trusted.
+RACY_TIME = 2
+
+
+def check_icons(icons_dir):
+    """Return True if every icon of both themes exists, one listing per theme."""
+    for theme in ("dark", "light"):
+        try:
+            names = set(os.listdir(icons_dir / theme))
+        except FileNotFoundError:
+            return False
+        if not ICONS <= names:
+            return False
+
+    return True
+
+
+def list_books(books_dir):
+    """Return {name: (size, mtime_ns)} of the book files of all formats."""
+    suffixes = book_suffixes()
+    books = {}
+    with os.scandir(books_dir) as entries:
+        for entry in entries:
+            name, suffix = os.path.splitext(entry.name)
+            suffix = suffix.lower()
+            if suffix not in suffixes or not entry.is_file():
+                continue
+            # The ".txt" file of a book is preferred to the other formats.
+            if name in books and suffixes.index(suffix) > books[name][0]:
+                continue
+            stat = entry.stat()
+            books[name] = (suffixes.index(suffix), stat.st_size, stat.st_mtime_ns)
+
+    return {name: (size, mtime) for name, (priority, size, mtime) in books.items()}
+
+
+def load_manifest(path):
+    try:
+        with open(path, encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(path, mtime, books):
+    if time.time_ns() - mtime < RACY_TIME * 10**9:
+        mtime = None
+
+    temp = path.with_name(path.name + ".part")
+    with open(temp, "w", encoding="utf-8") as file:
+        json.dump({"books_mtime": mtime, "books": books}, file)
+    os.replace(temp, path)
+
+
+def remove_book_files(books_config_dir, book):
+    """Remove the files of the book in the config: the cached text and sentences, the old settings."""
+    for suffix in (".ini", ".idx", ".prep", ".text", ".chapters"):
+        (books_config_dir / (book + suffix)).unlink(missing_ok=True)
+
+
+def import_book_settings(library, books_config_dir, books):
+    """Move the settings of the books from the book_name.ini files of older versions."""
+    paths = []
+    for book in books:
+        path = books_config_dir / (book + ".ini")
+        if path.exists():
+            book_settings = QSettings(str(path), QSettings.IniFormat)
+            library.save(book, **{key: book_settings.value(key) for key in book_settings.allKeys()})
+            del book_settings
+            paths.append(path)
+
+    # The files are removed when their settings are written.
+    library.flush()
+    for path in paths:
+        path.unlink()
+
+
 def check_files(config):
     """Check icons, books, settings files."""
     config.config_dir.mkdir(parents=True, exist_ok=True)
     (config.config_dir / "settings.ini").touch(exist_ok=True)
     (config.config_dir / "books").mkdir(parents=True, exist_ok=True)
-    
+
     if not config.nltk_data_dir.exists():
         dialog = QuickMessage("File Check", "The 'nltk_data' folder was not found.", config)
         dialog.exec()
 
         return False
-    
+
     # Check icons.
     if not config.icons_dir.exists():
         dialog = QuickMessage("File Check", "The 'icons' folder was not found.", config)
         dialog.exec()
-        
+
         return False
-    elif (not (config.icons_dir / "dark/headphones.ico").exists()
-          or not (config.icons_dir / "dark/next.ico").exists()
-          or not (config.icons_dir / "dark/pause.ico").exists()
-          or not (config.icons_dir / "dark/play.ico").exists()
-          or not (config.icons_dir / "dark/previous.ico").exists()
-          or not (config.icons_dir / "dark/settings.ico").exists()
-          or not (config.icons_dir / "light/headphones.ico").exists()
-          or not (config.icons_dir / "light/next.ico").exists()
-          or not (config.icons_dir / "light/pause.ico").exists()
-          or not (config.icons_dir / "light/play.ico").exists()
-          or not (config.icons_dir / "light/previous.ico").exists()
-          or not (config.icons_dir / "light/settings.ico").exists()
-    ):
+    elif not check_icons(config.icons_dir):
         dialog = QuickMessage("File Check", "An icon was not found in the 'icons' folder.", config)
         dialog.exec()
-        
+
         return False
-    
+
     # Check books.
     if not config.books_dir.exists():
         dialog = QuickMessage("File Check", "The 'books' folder was not found.", config)
         dialog.exec()
-        
+
         return False
-    else:
-        book_list = [
-            file.with_suffix(".ini").name
-            for file in config.books_dir.iterdir()
-            if file.suffix == ".txt"
-        ]
-        config_list = [
-            file.name
-            for file in (config.config_dir / "books").iterdir()
-            if file.suffix == ".ini"
-        ]
-        
-        if book_list == []:
-            # Remove all book_name.ini files.
-            for c in config_list:
-                (config.books_dir / c).unlink()
-            
-            dialog = QuickMessage(
-                "File Check",
-                "No '.txt' files were found in the 'books' folder.",
-                config
-            )
-            dialog.exec()
-            
-            return False
-        else:
-            for c in config_list:
-                if not c in book_list:
-                    # Remove book_name.ini if no book_name.txt.
-                    (config.config_dir / "books" / c).unlink()
-                else:
-                    book_list.remove(c)
-            
-            # Create the .ini file for each new book.
-            for book in book_list:
-                (config.config_dir / "books" / book).touch(exist_ok=False)
-    
-    return True
\ No newline at end of file
+
+    # Adding, removing or renaming a book changes the mtime of the folder.
+    books_mtime = os.stat(config.books_dir).st_mtime_ns
+    manifest_path = config.config_dir / MANIFEST
+    manifest = load_manifest(manifest_path)
+    if (manifest.get("books") and manifest.get("books_mtime") == books_mtime
+        and manifest["books"] == len(config.library)):
+        return True
+
+    books_config_dir = config.config_dir / "books"
+    books = list_books(config.books_dir)
+    added, removed = config.library.sync(books)
+    # Remove the settings of the removed books.
+    for book in removed:
+        remove_book_files(books_config_dir, book)
+
+    if not books:
+        manifest_path.unlink(missing_ok=True)
+
+        dialog = QuickMessage(
+            "File Check",
+            "No books were found in the 'books' folder.",
+            config
+        )
+        dialog.exec()
+
+        return False
+
+    import_book_settings(config.library, books_config_dir, added)
+
+    save_manifest(manifest_path, books_mtime, len(books))
+
+    return True
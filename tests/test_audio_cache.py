@@ -0,0 +1,33 @@
+import numpy as np
+
+from src.core.audio_cache import AudioCache
+
+
+def test_cache_round_trip_and_counters(tmp_path):
+    cache = AudioCache(tmp_path, 1024 * 1024)
+    key = cache.key("Hello.", "voice")
+
+    assert cache.get(key) is None
+    cache.put(key, np.linspace(-1, 1, 100, dtype=np.float32), 2.0)
+    audio = cache.get(key)
+
+    assert np.allclose(audio, np.linspace(-1, 1, 100), atol=1e-4)
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["saved_time"] == 2.0
+    # The key depends on the voice.
+    assert cache.key("Hello.", "voice") != cache.key("Hello.", "other voice")
+
+
+def test_cache_removes_least_recently_used(tmp_path):
+    cache = AudioCache(tmp_path, 5000)
+    for name in ("a", "b", "c"):
+        cache.put(name, np.zeros(1000, dtype=np.float32))
+        # "a" is used again, so "b" is the oldest one.
+        cache.get("a")
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.size <= 5000
+    # The index is restored from the disk.
+    assert set(AudioCache(tmp_path, 5000).entries) == set(cache.entries)
@@ -0,0 +1,92 @@
+from threading import Timer
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+try:
+    import sounddevice
+except (ImportError, OSError):
+    pytest.skip("The PortAudio library is not installed.", allow_module_level=True)
+
+from src.core.audio_output import AudioOutput
+
+
+class _FakeStream:
+    """The stream without a device, the test calls the callback."""
+    def __init__(self, **kwargs):
+        self.started = False
+
+    def start(self):
+        self.started = True
+
+    def stop(self):
+        self.started = False
+
+    def close(self):
+        pass
+
+
+STATUS = SimpleNamespace(output_underflow=False)
+
+
+@pytest.fixture
+def output(monkeypatch):
+    monkeypatch.setattr(sounddevice, "OutputStream", _FakeStream)
+    output = AudioOutput(samplerate=10, buffer_time=1)
+    output.start()
+
+    return output
+
+
+def play(output, frames):
+    outdata = np.full((frames, 1), -1, dtype=np.float32)
+    output._callback(outdata, frames, None, STATUS)
+
+    return outdata[:, 0]
+
+
+def test_ring_buffer_wraps_around(output):
+    assert output.write(np.arange(8, dtype=np.float32)) == 8
+    assert list(play(output, 6)) == [0, 1, 2, 3, 4, 5]
+
+    # Only the free space of the buffer is written, the rest waits for the device.
+    assert output.write(np.arange(8, 20, dtype=np.float32), 0) == 8
+    assert output.write(np.ones(1, dtype=np.float32), 0) == 0
+    assert list(play(output, 12)) == [6, 7, *range(8, 16), 0, 0]
+    assert output.played == output.written == 16
+
+
+def test_pause_silences_and_keeps_the_audio(output):
+    output.write(np.ones(4, dtype=np.float32))
+    output.pause()
+
+    assert list(play(output, 4)) == [0, 0, 0, 0]
+    assert output.played == 0
+
+    output.start()
+    assert list(play(output, 4)) == [1, 1, 1, 1]
+
+
+def test_clear_drops_the_unplayed_audio(output):
+    output.write(np.ones(6, dtype=np.float32))
+    play(output, 2)
+    output.clear()
+
+    assert list(play(output, 3)) == [0, 0, 0]
+    assert output.played == output.written == 2
+
+
+def test_stop_waits_for_the_buffered_audio(output):
+    output.write(np.ones(6, dtype=np.float32))
+    play(output, 2)
+
+    def device():
+        while output.played < output.written:
+            play(output, 1)
+
+    Timer(0.05, device).start()
+    output.stop()
+
+    assert output.played == 6
+    assert not output.stream.started
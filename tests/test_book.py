@@ -0,0 +1,37 @@
+import os
+
+from nltk.data import path
+
+from src.app_config import AppConfig
+from src.core.book import Book, open_book, read_index
+
+path.append(str(AppConfig().NLTK_DATA_DIR))
+
+
+def test_index_is_reused_and_invalidated(tmp_path):
+    book = tmp_path / "book.txt"
+    index = tmp_path / "book.idx"
+    book.write_text("Привет, мир. It costs $4.25!\r\nThe end.", encoding="utf-8")
+
+    sentences = open_book(book, index)
+    assert list(sentences) == ["Привет, мир.", "It costs $4.25!", "The end."]
+    sentences.close()
+    assert read_index(book, index) is not None
+
+    # The same text with another mtime keeps the index.
+    os.utime(book, ns=(0, 0))
+    assert read_index(book, index) is not None
+
+    book.write_text("Another text. Two sentences.", encoding="utf-8")
+    assert read_index(book, index) is None
+    assert list(open_book(book, index)) == ["Another text.", "Two sentences."]
+
+
+def test_book_sequence_access():
+    book = Book.from_sentences(["Один.", "Two.", "Три."])
+
+    assert len(book) == 3
+    assert book[1] == "Two."
+    assert book[-1] == "Три."
+    assert book[:2] == ["Один.", "Two."]
+    assert book[5:] == []
@@ -0,0 +1,51 @@
+from PySide6.QtCore import Qt
+
+from src.core.book import Book
+from src.gui.book_view import BookView
+
+
+class _CountingBook(Book):
+    """Count the sentences read from the book."""
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.reads = set()
+
+    def __getitem__(self, index):
+        self.reads.add(index)
+        return super().__getitem__(index)
+
+
+def make_book(count):
+    book = Book.from_sentences(f"Sentence\n{i}." for i in range(count))
+    return _CountingBook(book.data, book.offsets)
+
+
+def test_only_visible_rows_are_read(qtbot):
+    book = make_book(50000)
+    view = BookView()
+    view.resize(400, 300)
+    qtbot.addWidget(view)
+    view.show()
+
+    view.show_sentence(book, 40000)
+    qtbot.wait(50)
+
+    assert view.model() is view.book_model
+    assert view.book_model.rowCount() == 50000
+    assert view.book_model.data(view.book_model.index(40000)) == "40000: Sentence 40000."
+    assert len(book.reads) < 200
+
+
+def test_current_sentence_and_click(qtbot):
+    book = make_book(10)
+    view = BookView()
+    qtbot.addWidget(view)
+
+    view.show_sentence(book, 3)
+    assert view.book_model.data(view.book_model.index(3), Qt.BackgroundRole) is not None
+    view.show_sentence(book, 4)
+    assert view.book_model.data(view.book_model.index(3), Qt.BackgroundRole) is None
+
+    with qtbot.waitSignal(view.sentence_clicked) as blocker:
+        view.clicked.emit(view.book_model.index(7))
+    assert blocker.args == [7]
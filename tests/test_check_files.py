@@ -0,0 +1,115 @@
+import os
+import time
+from types import SimpleNamespace
+
+from PySide6.QtCore import QSettings
+
+from src.core.library import Library
+from src.utils.check_files import ICONS, MANIFEST, check_files
+
+
+def make_config(tmp_path):
+    config = SimpleNamespace(
+        config_dir=tmp_path / "config",
+        icons_dir=tmp_path / "icons",
+        books_dir=tmp_path / "books",
+        nltk_data_dir=tmp_path / "nltk_data",
+        library=Library(tmp_path / "config" / "library.sqlite"),
+    )
+    config.nltk_data_dir.mkdir()
+    for theme in ("dark", "light"):
+        (config.icons_dir / theme).mkdir(parents=True)
+        for icon in ICONS:
+            (config.icons_dir / theme / icon).touch()
+    config.books_dir.mkdir()
+
+    return config
+
+
+def age(folder, seconds=60):
+    """Make the folder look changed long ago, so its snapshot is trusted."""
+    old = time.time() - seconds
+    os.utime(folder, (old, old))
+
+
+def test_books_are_reconciled(tmp_path):
+    config = make_config(tmp_path)
+    books_config_dir = config.config_dir / "books"
+    for name in ("a", "b"):
+        (config.books_dir / f"{name}.txt").touch()
+    (config.books_dir / "removed.txt").touch()
+    assert check_files(config)
+    config.library.save("a", current_sentence=5)
+    for suffix in (".idx", ".prep"):
+        (books_config_dir / f"removed{suffix}").touch()
+
+    (config.books_dir / "removed.txt").unlink()
+    assert check_files(config)
+
+    assert sorted(config.library.names()) == ["a", "b"]
+    assert list(books_config_dir.iterdir()) == []
+    # The settings of a kept book are not touched.
+    assert config.library.load("a")["current_sentence"] == 5
+
+
+def test_settings_are_imported_from_ini_files(tmp_path):
+    config = make_config(tmp_path)
+    (config.books_dir / "a.txt").touch()
+    (config.config_dir / "books").mkdir(parents=True)
+    book_settings = QSettings(str(config.config_dir / "books" / "a.ini"), QSettings.IniFormat)
+    book_settings.setValue("current_sentence", 12)
+    book_settings.setValue("speaker", "Speaker: en_3")
+    book_settings.sync()
+    del book_settings
+
+    assert check_files(config)
+
+    assert config.library.load("a") == {"current_sentence": 12, "speaker": "Speaker: en_3"}
+    assert not (config.config_dir / "books" / "a.ini").exists()
+    # The settings are written before the file is removed, as after a crash.
+    other = Library(config.config_dir / "library.sqlite")
+    assert other.load("a")["current_sentence"] == 12
+
+
+def test_unchanged_library_uses_the_manifest(tmp_path):
+    config = make_config(tmp_path)
+    (config.books_dir / "a.txt").touch()
+    age(config.books_dir)
+    assert check_files(config)
+    assert (config.config_dir / MANIFEST).exists()
+
+    # The books folder isn't listed again while its mtime is the same.
+    mtime = os.stat(config.books_dir).st_mtime_ns
+    (config.books_dir / "c.txt").touch()
+    os.utime(config.books_dir, ns=(mtime, mtime))
+    assert check_files(config)
+    assert config.library.names() == ["a"]
+
+    (config.books_dir / "b.txt").touch()
+    age(config.books_dir, 30)
+    assert check_files(config)
+    assert sorted(config.library.names()) == ["a", "b", "c"]
+
+
+def test_recently_changed_library_is_checked_again(tmp_path):
+    config = make_config(tmp_path)
+    (config.books_dir / "a.txt").touch()
+    assert check_files(config)
+
+    (config.books_dir / "b.txt").touch()
+    assert check_files(config)
+    assert sorted(config.library.names()) == ["a", "b"]
+
+
+def test_missing_icon(tmp_path, monkeypatch):
+    config = make_config(tmp_path)
+    (config.books_dir / "a.txt").touch()
+    (config.icons_dir / "light" / "play.ico").unlink()
+    messages = []
+    monkeypatch.setattr(
+        "src.utils.check_files.QuickMessage",
+        lambda title, text, config: SimpleNamespace(exec=lambda: messages.append(text))
+    )
+
+    assert not check_files(config)
+    assert messages == ["An icon was not found in the 'icons' folder."]
@@ -0,0 +1,138 @@
+import json
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import src.export
+from src.app_config import AppConfig
+from src.core import preprocessing
+from src.core.audio_cache import AudioCache
+from src.export import export, split_chapters, MIN_CHAPTER
+
+
+class _InlineExecutor:
+    """The process pool replaced by the calls in the test process."""
+    def __init__(self, workers, mp_context, initializer, initargs):
+        initializer(*initargs)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def submit(self, function, *args):
+        result = function(*args)
+
+        return SimpleNamespace(result=lambda: result)
+
+
+def _fake_language(voiced):
+    """The language pack with a fake voice engine: one sample per character."""
+    def text_to_speech_batch(sentences):
+        voiced.extend(sentences)
+        return [np.full(len(sentence), 0.5, dtype=np.float32) for sentence in sentences]
+
+    voice_engine = SimpleNamespace(
+        SAMPLE_RATE=10,
+        BATCH_WORKERS=4,
+        get_settings=lambda: {"speaker": ["Speaker: a"]},
+        set_settings=lambda parameter, value, core_dir: None,
+        get_voice_id=lambda: "fake",
+        import_torch=lambda: SimpleNamespace(set_num_threads=lambda threads: None),
+        text_to_speech_batch=text_to_speech_batch,
+    )
+
+    return SimpleNamespace(name="Fake", preprocessing=preprocessing, voice_engine=voice_engine)
+
+
+def _fake_config(tmp_path, text="One."):
+    """The app config with the "book" of the text."""
+    config = SimpleNamespace(
+        BASE_DIR=tmp_path,
+        BOOKS_DIR=tmp_path / "books",
+        CONFIG_DIR=tmp_path / "config",
+        CORE_DIR=tmp_path,
+        NLTK_DATA_DIR=AppConfig().NLTK_DATA_DIR,
+        LIBRARY=SimpleNamespace(load=lambda book: {}),
+    )
+    config.BOOKS_DIR.mkdir()
+    (config.CONFIG_DIR / "books").mkdir(parents=True)
+    (config.BOOKS_DIR / "book.txt").write_text(text, encoding="utf-8")
+
+    return config
+
+
+def test_split_chapters_skips_table_of_contents():
+    book = ["Title.", "Chapter I.", "Chapter II.", "Contents end.\nChapter I."]
+    book += ["Text."] * MIN_CHAPTER + ["Text.\n\nCHAPTER II."] + ["Text."] * MIN_CHAPTER
+
+    assert split_chapters(book) == [0, 3, 4 + MIN_CHAPTER]
+
+
+def test_book_without_chapters_is_one_chapter():
+    assert split_chapters(["One.", "Two."]) == [0]
+
+
+def test_export_resumes_and_writes_chapters(tmp_path, monkeypatch):
+    text = ""
+    for chapter in ("one", "two"):
+        text += f"Chapter {chapter}.\n\n"
+        text += "".join(f"Sentence {i} of {chapter}.\n\n" for i in range(MIN_CHAPTER))
+    config = _fake_config(tmp_path, text)
+    voiced = []
+    language = _fake_language(voiced)
+    monkeypatch.setattr(src.export, "AppConfig", lambda: config)
+    monkeypatch.setattr(src.export, "get_language", lambda name=None: language)
+    monkeypatch.setattr(src.export, "ProcessPoolExecutor", _InlineExecutor)
+    monkeypatch.setattr(src.export, "as_completed", lambda futures: futures)
+
+    export("book", workers=2)
+
+    book_dir = tmp_path / "export" / "book"
+    assert sorted(p.name for p in book_dir.glob("*.wav")) == ["001.wav", "002.wav"]
+    assert len(voiced) == 2 * (MIN_CHAPTER + 1)
+    assert language.voice_engine.BATCH_WORKERS == 1
+    with (book_dir / "index.json").open(encoding="utf-8") as file:
+        index = json.load(file)
+    assert index["voice_id"] == "fake"
+    assert [entry["file"] for entry in index["sentences"]].count("002.wav") == MIN_CHAPTER + 1
+    assert index["sentences"][0] == {"sentence": 0, "file": "001.wav", "start": 0.0, "end": 1.2}
+
+    # The interrupted export: a voiced sentence and a chapter file are missing.
+    voiced.clear()
+    sentence = next((book_dir / "sentences").glob("*.npy"))
+    sentence.unlink()
+    (book_dir / "001.wav").write_bytes(b"kept")
+    (book_dir / "002.wav").unlink()
+    export("book", workers=2)
+
+    assert len(voiced) == 1
+    assert (book_dir / "001.wav").read_bytes() == b"kept"
+    assert (book_dir / "002.wav").exists()
+    with (book_dir / "index.json").open(encoding="utf-8") as file:
+        assert json.load(file) == index
+
+    # Another voice: the sentences are voiced again and the chapter files are rewritten.
+    voiced.clear()
+    language.voice_engine.get_voice_id = lambda: "other"
+    export("book", workers=2)
+
+    assert len(voiced) == 2 * (MIN_CHAPTER + 1)
+    assert (book_dir / "001.wav").read_bytes() != b"kept"
+
+
+def test_export_fails_on_a_missing_sentence(tmp_path, monkeypatch):
+    config = _fake_config(tmp_path)
+    language = _fake_language([])
+    monkeypatch.setattr(src.export, "AppConfig", lambda: config)
+    monkeypatch.setattr(src.export, "get_language", lambda name=None: language)
+    # A sentence that was "voiced" in an earlier run, its file is damaged.
+    sentences_dir = tmp_path / "export" / "book" / "sentences"
+    sentences_dir.mkdir(parents=True)
+    key = AudioCache.key("One.", "fake")
+    (sentences_dir / (key + ".npy")).write_bytes(b"damaged")
+
+    with pytest.raises(SystemExit, match="sentence 0 is missing"):
+        export("book")
@@ -0,0 +1,118 @@
+import zipfile
+
+from nltk.data import path
+
+from src.app_config import AppConfig
+from src.core.book import open_book
+from src.core.formats import chapter_sentences, extract_book, find_book
+
+path.append(str(AppConfig().NLTK_DATA_DIR))
+
+
+FB2 = """<?xml version="1.0" encoding="windows-1251"?>
+<FictionBook xmlns="http://www.gribuser.ru/xml/fictionbook/2.0" xmlns:l="http://www.w3.org/1999/xlink">
+<description><title-info><annotation><p>Аннотация.</p></annotation></title-info></description>
+<body>
+<section><title><p>Глава 1</p></title>
+<p>Первый <emphasis>абзац</emphasis>.</p>
+<section><title><p>Часть</p><p>вторая</p></title><p>Второй абзац.</p></section>
+</section>
+</body>
+<body name="notes"><section><p>Примечание.</p></section></body>
+<binary id="cover.jpg" content-type="image/jpeg">AAAA</binary>
+</FictionBook>
+"""
+
+CONTAINER = """<?xml version="1.0"?>
+<container xmlns="urn:oasis:names:tc:opendocument:xmlns:container" version="1.0">
+<rootfiles><rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/></rootfiles>
+</container>
+"""
+
+OPF = """<?xml version="1.0"?>
+<package xmlns="http://www.idpf.org/2007/opf" version="2.0">
+<manifest>
+<item id="one" href="text/chapter%201.xhtml" media-type="application/xhtml+xml"/>
+<item id="two" href="text/two.xhtml" media-type="application/xhtml+xml"/>
+</manifest>
+<spine><itemref idref="two"/><itemref idref="one"/></spine>
+</package>
+"""
+
+
+def xhtml(body):
+    return f"<html><head><title>Ignored</title><style>p {{}}</style></head><body>{body}</body></html>"
+
+
+def read_text(text_path):
+    return text_path.read_text(encoding="utf-8").split("\n\n")[:-1]
+
+
+def test_fb2(tmp_path):
+    book = tmp_path / "book.fb2"
+    book.write_bytes(FB2.encode("windows-1251"))
+
+    text_path, chapters = extract_book(book, tmp_path)
+
+    assert read_text(text_path) == ["Глава 1.", "Первый абзац.", "Часть вторая.", "Второй абзац."]
+    assert [title for title, offset in chapters] == ["Глава 1", "Часть вторая"]
+    assert chapters[1][1] == len("Глава 1.\n\nПервый абзац.\n\n".encode("utf-8"))
+
+
+def test_epub(tmp_path):
+    book = tmp_path / "book.epub"
+    with zipfile.ZipFile(book, "w") as archive:
+        archive.writestr("META-INF/container.xml", CONTAINER)
+        archive.writestr("OEBPS/content.opf", OPF)
+        archive.writestr("OEBPS/text/chapter 1.xhtml", xhtml("<p>No heading &amp; more text here.</p>"))
+        archive.writestr(
+            "OEBPS/text/two.xhtml",
+            xhtml("<h1>Chapter <i>One</i></h1><p>First<br/>line.</p><script>x()</script>")
+        )
+
+    text_path, chapters = extract_book(book, tmp_path)
+
+    assert read_text(text_path) == [
+        "Chapter One.", "First", "line.", "No heading & more text here."
+    ]
+    assert [title for title, offset in chapters] == ["Chapter One", "No heading & more text here."]
+
+
+def test_html_chapters_map_to_sentences(tmp_path):
+    book = tmp_path / "book.html"
+    book.write_text(
+        '<html><head><meta charset="utf-8"></head><body><h2>Part one<br/>The Beginning</h2>'
+        "<p>One. Two.</p>"
+        "<h2>Part two</h2><div>Three.</div></body></html>",
+        encoding="utf-8"
+    )
+
+    text_path, chapters = extract_book(book, tmp_path)
+    sentences = open_book(text_path, tmp_path / "book.idx")
+
+    assert list(sentences) == ["Part one The Beginning.", "One.", "Two.", "Part two.", "Three."]
+    assert chapter_sentences(sentences, chapters) == [
+        ("Part one The Beginning", 0), ("Part two", 3)
+    ]
+    sentences.close()
+
+
+def test_text_is_cached_until_the_book_changes(tmp_path):
+    book = tmp_path / "book.html"
+    book.write_text("<p>Old.</p>", encoding="utf-8")
+    text_path, chapters = extract_book(book, tmp_path)
+    text_path.write_text("Cached.\n\n", encoding="utf-8")
+
+    assert read_text(extract_book(book, tmp_path)[0]) == ["Cached."]
+
+    book.write_text("<p>New text.</p>", encoding="utf-8")
+    assert read_text(extract_book(book, tmp_path)[0]) == ["New text."]
+
+
+def test_find_book_prefers_txt(tmp_path):
+    (tmp_path / "a.fb2").touch()
+    assert find_book(tmp_path, "a") == tmp_path / "a.fb2"
+    (tmp_path / "a.txt").touch()
+    assert find_book(tmp_path, "a") == tmp_path / "a.txt"
+    assert find_book(tmp_path, "b") is None
+    assert extract_book(tmp_path / "a.txt", tmp_path) == (tmp_path / "a.txt", [])
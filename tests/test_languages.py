@@ -0,0 +1,23 @@
+from src.core import preprocessing
+from src.core.languages import available_languages, default_language, get_language
+
+
+def test_default_language_is_the_installed_pack():
+    assert default_language() == "English"
+    assert {"English", "Russian"} <= set(available_languages())
+    # The default pack uses the "src.core" modules, so its models are loaded once.
+    assert get_language("English").preprocessing is preprocessing
+
+
+def test_unknown_language_is_the_default_one():
+    assert get_language(None) is get_language("English")
+    assert get_language("Klingon") is get_language("English")
+
+
+def test_pack_is_loaded_separately():
+    russian = get_language("Russian")
+
+    assert russian is get_language("Russian")
+    assert russian.preprocessing is not preprocessing
+    assert russian.preprocessing.__file__.endswith("Russian/preprocessing.py")
+    assert russian.preprocessing.check_readable_symbols("Привет, мир.")
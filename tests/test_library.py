@@ -0,0 +1,119 @@
+import time
+
+from src.core import library as library_module
+from src.core.library import Library
+
+
+def test_sync_adds_and_removes_books(tmp_path):
+    library = Library(tmp_path / "library.sqlite")
+
+    assert library.sync({"a": (1, 1), "b": (2, 2)}) == (["a", "b"], [])
+    library.opened("a", b"\x01\x02", 10)
+    assert library.sync({"a": (3, 3), "c": (4, 4)}) == (["c"], ["b"])
+
+    assert len(library) == 2
+    assert "b" not in library
+    # The changed text is counted again on the opening.
+    assert library.info("a")["sentences"] is None
+    assert library.info("a")["size"] == 3
+
+
+def test_settings(tmp_path):
+    library = Library(tmp_path / "library.sqlite")
+    library.sync({"a": (1, 1)})
+
+    assert library.load("a") == {"current_sentence": 0}
+    library.save("a", current_sentence=7, speed=1.5, language="Russian")
+    library.save("a", speaker="Speaker: baya")
+    assert library.load("a") == {
+        "current_sentence": 7, "speed": 1.5, "language": "Russian", "speaker": "Speaker: baya"
+    }
+    assert library.load("unknown") == {}
+
+    # The library is kept on the disk.
+    library.close()
+    assert Library(tmp_path / "library.sqlite").load("a")["current_sentence"] == 7
+
+
+def test_search_finds_the_last_read_first(tmp_path):
+    library = Library(tmp_path / "library.sqlite")
+    library.sync({name: (0, 0) for name in ["Алиса в стране чудес", "Alice", "A Room", "50%"]})
+    library.opened("A Room", None, 1)
+    library.flush()
+
+    assert library.names() == ["A Room", "50%", "Alice", "Алиса в стране чудес"]
+    assert library.names(limit=1) == ["A Room"]
+    assert library.names("алиса") == ["Алиса в стране чудес"]
+    assert library.names("ALI") == ["Alice"]
+    assert library.names("%") == ["50%"]
+
+
+def test_updates_are_written_later_in_one_batch(tmp_path, monkeypatch):
+    monkeypatch.setattr(library_module, "FLUSH_INTERVAL", 0.2)
+    library = Library(tmp_path / "library.sqlite")
+    library.sync({"a": (1, 1)})
+    # Another connection sees only the written updates, as after a crash.
+    other = Library(tmp_path / "library.sqlite")
+
+    for i in range(10):
+        library.save("a", current_sentence=i)
+    assert library.load("a")["current_sentence"] == 9
+    assert other.load("a")["current_sentence"] == 0
+
+    deadline = time.monotonic() + 5
+    while other.load("a")["current_sentence"] != 9 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert other.load("a")["current_sentence"] == 9
+
+
+def test_many_updates_are_written_at_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(library_module, "FLUSH_INTERVAL", 60)
+    library = Library(tmp_path / "library.sqlite")
+    library.sync({"a": (1, 1)})
+    other = Library(tmp_path / "library.sqlite")
+
+    for i in range(library_module.FLUSH_UPDATES):
+        library.save("a", speed=i)
+
+    deadline = time.monotonic() + 5
+    while other.load("a").get("speed") is None and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert other.load("a")["speed"] == library_module.FLUSH_UPDATES - 1
+    library.close()
+
+
+def test_opened_book_is_listed_first_at_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(library_module, "FLUSH_INTERVAL", 60)
+    library = Library(tmp_path / "library.sqlite")
+    library.sync({"a": (0, 0), "b": (0, 0)})
+
+    other = Library(tmp_path / "library.sqlite")
+
+    library.opened("b", None, 1)
+    assert library.names() == ["b", "a"]
+    assert library.names(limit=1) == ["b"]
+    assert library.names("a") == ["a"]
+    # The update is queued, the opening doesn't wait for the disk.
+    assert other.names() == ["a", "b"]
+    library.close()
+
+
+def test_updates_are_seen_while_they_are_written(tmp_path, monkeypatch):
+    library = Library(tmp_path / "library.sqlite")
+    library.sync({"a": (1, 1)})
+    library.save("a", current_sentence=5, speed=1.5)
+
+    write = library._write
+    loaded = []
+
+    def load_and_write(pending):
+        # Neither queued nor written.
+        loaded.append(library.load("a"))
+        write(pending)
+
+    monkeypatch.setattr(library, "_write", load_and_write)
+    library.flush()
+
+    assert loaded == [{"current_sentence": 5, "speed": 1.5}]
+    assert library.load("a") == {"current_sentence": 5, "speed": 1.5}
+    library.close()
@@ -0,0 +1,44 @@
+import csv
+import json
+
+from src.core.metrics import Histogram, Metrics
+
+
+def test_histogram_keeps_the_last_values():
+    histogram = Histogram(size=10)
+    for value in range(100):
+        histogram.add(value)
+
+    summary = histogram.summary()
+    assert summary["count"] == 100
+    assert summary["last"] == 99
+    assert summary["max"] == 99
+    assert summary["p50"] == 94.5
+
+
+def test_disabled_metrics_record_nothing():
+    metrics = Metrics()
+    with metrics.timer("a"):
+        pass
+    metrics.record("b", 1)
+
+    assert metrics.summary() == {}
+    assert not metrics.trace
+
+
+def test_export(tmp_path):
+    metrics = Metrics(enabled=True)
+    with metrics.timer("text_to_speech_ms"):
+        pass
+    metrics.record("queue_depth", 3)
+
+    metrics.export_csv(tmp_path / "trace.csv")
+    with open(tmp_path / "trace.csv", newline="") as file:
+        rows = list(csv.reader(file))
+    assert rows[0] == ["time", "name", "value"]
+    assert [row[1] for row in rows[1:]] == ["text_to_speech_ms", "queue_depth"]
+
+    metrics.export_json(tmp_path / "trace.json")
+    report = json.loads((tmp_path / "trace.json").read_text())
+    assert report["summary"]["queue_depth"]["last"] == 3
+    assert len(report["trace"]) == 2
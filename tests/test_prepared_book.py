@@ -0,0 +1,60 @@
+from src.core.book import Book
+from src.core.languages import get_language
+from src.core.prepared_book import PreparedBook
+
+
+def test_prepared_book_is_stored_and_reloaded(tmp_path):
+    book = Book.from_sentences(["It costs 5 dollars.", "***", "The end."])
+    book.identity = b"x" * 40
+
+    prepared_book = PreparedBook(book, tmp_path / "book.prep")
+    prepared_book.start(1)
+    prepared_book.thread.join()
+
+    assert list(prepared_book) == ["It costs five dollars.", "***", "The end."]
+    assert [prepared_book.is_readable(i) for i in range(3)] == [True, False, True]
+
+    # The next time the sentences are loaded from the file.
+    reloaded_book = PreparedBook(book, tmp_path / "book.prep")
+    assert reloaded_book.prepared is not None
+    assert list(reloaded_book) == list(prepared_book)
+    assert not reloaded_book.is_readable(1)
+    reloaded_book.close()
+
+    # Another text (or preprocessing) invalidates the file.
+    book.identity = b"y" * 40
+    assert PreparedBook(book, tmp_path / "book.prep").prepared is None
+
+
+def test_preprocessing_error_does_not_stop_the_background_thread(tmp_path):
+    # "num2words" has no words for a number this big.
+    book = Book.from_sentences(["Раз.", "Число 1" + "0" * 40 + ".", "Два."])
+    book.identity = b"x" * 40
+
+    prepared_book = PreparedBook(book, tmp_path / "book.prep", get_language("Russian").preprocessing)
+    prepared_book.start(0)
+    prepared_book.thread.join()
+
+    assert prepared_book.prepared is not None
+    assert prepared_book.is_readable(2)
+    # The error is raised again on request.
+    try:
+        prepared_book.is_readable(1)
+    except KeyError:
+        pass
+    else:
+        assert False, "The preprocessing error was not raised"
+    prepared_book.close()
+
+
+def test_position_past_the_end_prepares_the_whole_book(tmp_path):
+    book = Book.from_sentences(["One.", "Two."])
+    book.identity = b"x" * 40
+
+    prepared_book = PreparedBook(book, tmp_path / "book.prep")
+    prepared_book.start(5)
+    prepared_book.thread.join()
+
+    assert prepared_book.prepared is not None
+    assert list(prepared_book) == ["One.", "Two."]
+    prepared_book.close()
@@ -15,4 +15,24 @@ def test_english_number_conversion():
 
 def test_russian_number_conversion():
     assert ru_n2w("Курс был 4,25") == "Курс был четыре целых двадцать пять сотых"
-    assert ru_n2w("У него 3 яблока.") == "У него три яблока."
\ No newline at end of file
+    assert ru_n2w("У него 3 яблока.") == "У него три яблока."
+
+def test_overlapping_number_conversion():
+    # Every number is replaced in its own place, not by the first similar substring.
+    assert en_n2w("Sizes 1x5 and 1.5") == "Sizes onexfive and one point five"
+    assert en_n2w("From 1 to 10 and 1") == "From one to ten and one"
+    assert en_n2w("It was +5 and -2") == "It was five and minus two"
+    assert ru_n2w("Было 12, стало 2") == "Было двенадцать, стало два"
+
+def load_latin_to_cyrillic(path, module_name):
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.latin_to_cyrillic
+
+ru_l2c = load_latin_to_cyrillic("languages/Russian/preprocessing.py", "ru_preprocessing_l2c")
+
+def test_russian_latin_to_cyrillic():
+    assert ru_l2c("Пакет SDK для Python") == "Пакет сдк для путхон"
+    assert ru_l2c("Буква A и буква b.") == "Буква эй и буква би."
+    assert ru_l2c("PHONE, shya, c++") == "фони, шя, си++"
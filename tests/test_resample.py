@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+
+from src.core.resample import resample
+
+
+@pytest.mark.parametrize("rate", [8000, 24000])
+def test_upsampled_tone_matches_the_ideal_one(rate):
+    tone = lambda t: 0.5 * np.sin(2 * np.pi * 1000 * t)
+    audio = tone(np.arange(rate) / rate).astype(np.float32)
+
+    output = resample(audio, rate, 48000)
+
+    assert len(output) == 48000
+    ideal = tone(np.arange(48000) / 48000)
+    # The edges are filtered with the zeros around the audio.
+    assert np.abs(output - ideal)[1000:-1000].max() < 1e-3
+    # The input samples are kept as they are.
+    assert np.allclose(output[::48000 // rate], audio, atol=1e-6)
+
+
+def test_same_rate_and_other_ratios():
+    audio = np.linspace(-1, 1, 441, dtype=np.float32)
+
+    assert resample(audio, 48000, 48000) is audio
+    assert len(resample(audio, 44100, 48000)) == 480
@@ -0,0 +1,198 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from src.core.audio_cache import AudioCache
+from src.core.book import Book
+from src.core.chunking import split_sentence
+from src.core.languages import get_language
+from src.core.prepared_book import PreparedBook
+from src.core.synthesis import SynthesisQueue
+
+
+class _FakeQueue(SynthesisQueue):
+    """Synthesis queue with a fake voice engine: one sample per character."""
+    def __init__(self, depth, chunk_size=0):
+        self.voiced = []
+        self.batches = []
+        super().__init__(depth, chunk_size=chunk_size)
+
+    def synthesize(self, text, voice_engine):
+        if text == "fail":
+            raise RuntimeError(text)
+        self.voiced.append(text)
+        return np.ones(len(text))
+
+    def synthesize_batch(self, texts, voice_engine):
+        self.batches.append(texts)
+        return [self.synthesize(text, voice_engine) for text in texts]
+
+
+def test_lookahead_reuses_queued_sentences():
+    queue = _FakeQueue(2)
+    queue.set_book(PreparedBook(Book.from_sentences(["a", "bb", "ccc", "d", "e"])))
+
+    assert len(queue.get(0)) == 1
+    assert queue.wait(2, 1)
+    assert len(queue.get(1)) == 2
+    assert len(queue.get(2)) == 3
+    queue.close()
+
+    assert queue.voiced.count("bb") == 1
+    assert queue.voiced.count("ccc") == 1
+
+
+def test_voice_engine_error_is_raised_by_get():
+    queue = _FakeQueue(1)
+    queue.set_book(PreparedBook(Book.from_sentences(["fail", "b"])))
+
+    try:
+        queue.get(0)
+    except RuntimeError as e:
+        assert str(e) == "fail"
+    else:
+        assert False, "The voice engine error was not raised"
+    queue.close()
+
+
+def test_unreadable_sentence_is_not_voiced():
+    queue = _FakeQueue(2)
+    queue.set_book(PreparedBook(Book.from_sentences(["a", "***", "b"])))
+
+    assert queue.get(1) is None
+    assert len(queue.get(2)) == 1
+    queue.close()
+
+    assert "***" not in queue.voiced
+
+
+def test_long_sentence_is_voiced_by_chunks():
+    sentence = "One two three, four five six; seven eight nine ten eleven twelve."
+    queue = _FakeQueue(0, chunk_size=20)
+    queue.set_book(PreparedBook(Book.from_sentences([sentence])))
+
+    audio = queue.get(0)
+    audio.wait(len(sentence), 1)
+    queue.close()
+
+    assert queue.voiced == split_sentence(sentence, 20)
+    assert len(queue.voiced) > 1
+    assert audio.done
+    assert len(audio.words) == len(sentence.split())
+
+
+def test_split_sentence():
+    assert split_sentence("Short one.", 20) == ["Short one."]
+    assert split_sentence("One, two, three, four.", 10) == ["One, two,", "three,", "four."]
+    assert split_sentence("A very long clause without commas.", 12) == [
+        "A very long", "clause", "without", "commas."
+    ]
+    assert all(len(chunk) <= 25 for chunk in split_sentence("word " * 100, 25))
+
+
+def test_short_sentences_ahead_are_voiced_by_batches():
+    queue = _FakeQueue(4)
+    queue.set_book(PreparedBook(Book.from_sentences(["a", "b", "c", "d", "e", "f"])))
+
+    assert len(queue.get(0)) == 1
+    assert queue.wait(4, 1)
+    queue.close()
+
+    # The current sentence is voiced alone, the next ones together.
+    assert queue.batches == [["b", "c", "d", "e"]]
+
+
+def test_audio_is_resampled_to_the_output_rate(tmp_path):
+    engine = SimpleNamespace(SAMPLE_RATE=24000, get_voice_id=lambda: "voice")
+    cache = AudioCache(tmp_path, 1 << 20)
+    queue = _FakeQueue(0)
+    queue.cache = cache
+    queue.set_book(PreparedBook(Book.from_sentences(["abcd"])), engine)
+
+    assert len(queue.get(0)) == 8
+    queue.close()
+
+    # The cache keeps the audio at the rate of the voice engine.
+    assert len(cache.get(cache.key("abcd", "voice"))) == 4
+
+
+def test_preprocessing_error_is_raised_by_get():
+    # "num2words" has no words for a number this big.
+    number = "Число 1" + "0" * 40 + "."
+    queue = _FakeQueue(3)
+    preprocessing = get_language("Russian").preprocessing
+    queue.set_book(PreparedBook(Book.from_sentences(["Раз.", "Два.", number, "Три."]), None, preprocessing))
+
+    assert len(queue.get(0)) == 4
+    assert len(queue.get(1)) == 4
+    try:
+        queue.get(2)
+    except KeyError:
+        pass
+    else:
+        assert False, "The preprocessing error was not raised"
+    # The worker is alive.
+    assert len(queue.get(3)) == 4
+    queue.close()
+
+
+def test_audio_voiced_after_a_settings_change_is_not_cached(tmp_path):
+    engine = SimpleNamespace(SAMPLE_RATE=48000, speaker="a")
+    engine.get_voice_id = lambda: engine.speaker
+
+    class _SwitchingQueue(_FakeQueue):
+        def synthesize_batch(self, texts, voice_engine):
+            # The speaker is changed while the batch is voiced.
+            engine.speaker = "b"
+            return super().synthesize_batch(texts, voice_engine)
+
+    cache = AudioCache(tmp_path, 1 << 20)
+    queue = _SwitchingQueue(2)
+    queue.cache = cache
+    queue.set_book(PreparedBook(Book.from_sentences(["a", "bb", "ccc"])), engine)
+
+    assert len(queue.get(0)) == 1
+    # The batch is voiced again with the new speaker.
+    for i in range(100):
+        if cache.get(cache.key("bb", "b")) is not None:
+            break
+        time.sleep(0.01)
+    else:
+        assert False, "The batch was not voiced again"
+    queue.close()
+
+    assert cache.get(cache.key("bb", "a")) is None
+
+
+def test_audio_dropped_during_synthesis_is_marked():
+    sentence = "One two three, four five six; seven eight nine ten eleven twelve."
+    release = threading.Event()
+
+    class _SlowQueue(_FakeQueue):
+        def synthesize(self, text, voice_engine):
+            # The next chunks wait for the test.
+            if self.voiced:
+                release.wait(1)
+            return super().synthesize(text, voice_engine)
+
+    queue = _SlowQueue(0, chunk_size=20)
+    queue.set_book(PreparedBook(Book.from_sentences([sentence])))
+
+    audio = queue.get(0)
+    # The voice settings are changed while the sentence is voiced.
+    queue.clear()
+    release.set()
+    audio.wait(len(sentence), 1)
+
+    assert audio.done and audio.dropped
+    assert len(audio) < len(sentence)
+    # The sentence is voiced again.
+    again = queue.get(0)
+    again.wait(len(sentence), 1)
+    queue.close()
+
+    assert again is not audio
+    assert again.done and not again.dropped
+    assert len(again) == sum(len(chunk) for chunk in split_sentence(sentence, 20))
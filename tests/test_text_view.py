@@ -0,0 +1,66 @@
+import pytest
+
+from src.core.book import Book
+from src.gui.text_view import TextView
+
+
+def expected_text(book, index, size):
+    return "\n".join(
+        "\n::" + str(i) + "::\n" + book[i] for i in range(max(0, index - size + 1), index + 1)
+    )
+
+
+@pytest.fixture
+def book():
+    return Book.from_sentences([f"Sentence {i}." if i % 3 else f"Line {i}\nof two." for i in range(50)])
+
+
+def test_steps_change_the_document_incrementally(qtbot, book):
+    view = TextView(size=5)
+    qtbot.addWidget(view)
+
+    steps = [0, 1, 2, 3, 4, 5, 6, 7, 6, 5, 4, 3, 2, 1, 0, 1, 20, 21, 20, 49, 48]
+    for index in steps:
+        view.show_sentence(book, index)
+        assert view.toPlainText() == expected_text(book, index, 5)
+        assert view.first == max(0, index - 4)
+
+
+def test_current_sentence_is_highlighted(qtbot, book):
+    view = TextView(size=5)
+    qtbot.addWidget(view)
+
+    for index in (10, 11, 12):
+        view.show_sentence(book, index)
+        selections = view.extraSelections()
+        text = selections[0].cursor.selectedText()
+        # Qt separates the blocks of a selection by the paragraph separator.
+        assert text.replace("\u2029", "\n") == f"::{index}::\n" + book[index]
+
+
+def test_book_change_rebuilds_the_document(qtbot, book):
+    view = TextView(size=5)
+    qtbot.addWidget(view)
+    view.show_sentence(book, 3)
+
+    other = Book.from_sentences(["One.", "Two."])
+    view.show_sentence(other, 1)
+    assert view.toPlainText() == expected_text(other, 1, 5)
+
+
+def test_spoken_word_is_highlighted(qtbot, book):
+    view = TextView(size=5)
+    qtbot.addWidget(view)
+    view.show_sentence(book, 3)
+
+    # "Line 3\nof two."
+    view.highlight_word(3, 7, 9)
+    selections = view.extraSelections()
+    assert len(selections) == 2
+    assert selections[1].cursor.selectedText() == "of"
+
+    # A word of another sentence is ignored, the next sentence clears the word.
+    view.highlight_word(2, 0, 4)
+    assert view.extraSelections()[1].cursor.selectedText() == "of"
+    view.show_sentence(book, 4)
+    assert len(view.extraSelections()) == 1
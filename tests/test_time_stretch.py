@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from src.core.time_stretch import TimeStretch
+
+
+SAMPLE_RATE = 48000
+
+
+def stretch(audio, speed, block=1024):
+    time_stretch = TimeStretch(speed, SAMPLE_RATE)
+    output = [time_stretch.process(audio[i:i+block]) for i in range(0, len(audio), block)]
+    output.append(time_stretch.flush())
+
+    return np.concatenate(output)
+
+
+def tone(frequency, duration):
+    return np.sin(2 * np.pi * frequency * np.arange(int(SAMPLE_RATE * duration)) / SAMPLE_RATE)
+
+
+@pytest.mark.parametrize("speed", [0.75, 1.5, 2.0])
+def test_length_changes_and_pitch_stays(speed):
+    audio = tone(220, 2).astype(np.float32)
+    output = stretch(audio, speed)
+
+    assert len(output) == round(len(audio) / speed)
+
+    # Skip the fade-in of the first frame.
+    middle = output[4800:-4800]
+    spectrum = np.abs(np.fft.rfft(middle * np.hanning(len(middle))))
+    frequency = np.fft.rfftfreq(len(middle), 1 / SAMPLE_RATE)[np.argmax(spectrum)]
+    assert abs(frequency - 220) < 2
+    # The overlapped frames keep the amplitude.
+    assert np.abs(middle).max() == pytest.approx(1, abs=0.05)
+
+
+def test_normal_speed_passes_the_audio():
+    audio = tone(440, 0.1).astype(np.float32)
+
+    assert np.array_equal(stretch(audio, 1.0), audio)
@@ -0,0 +1,51 @@
+import importlib.util
+
+import torch.package
+
+
+def load_voice_engine(path, module_name):
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class _FakeModel:
+    def to(self, device):
+        return self
+
+    def apply_tts(self, text, speaker, sample_rate):
+        return (text, speaker, sample_rate)
+
+
+def test_model_is_loaded_once(monkeypatch, tmp_path):
+    loaded = []
+
+    class _FakeImporter:
+        def __init__(self, path):
+            loaded.append(path)
+
+        def load_pickle(self, package, resource):
+            return _FakeModel()
+
+    monkeypatch.setattr(torch.package, "PackageImporter", _FakeImporter)
+
+    en = load_voice_engine("languages/English/voice_engine.py", "en_voice_engine")
+    en.set_settings("speaker", "Speaker: en_1", tmp_path)
+    en.set_settings("speaker", "Speaker: en_2", tmp_path)
+    # The model is loaded lazily by the first synthesis.
+    assert loaded == []
+    assert en.text_to_speech("Hello.") == ("Hello.", "en_2", en.SAMPLE_RATE)
+    en.set_settings("speaker", "Speaker: en_3", tmp_path)
+    assert en.text_to_speech("Hello.") == ("Hello.", "en_3", en.SAMPLE_RATE)
+    assert len(loaded) == 1
+
+    ru = load_voice_engine("languages/Russian/voice_engine.py", "ru_voice_engine")
+    ru.set_settings("voice_model", "Voice model: v3_1_ru", tmp_path)
+    ru.set_settings("speaker", "Speaker: baya", tmp_path)
+    ru.text_to_speech("Привет.")
+    ru.set_settings("voice_model", "Voice model: v4_ru", tmp_path)
+    ru.text_to_speech("Привет.")
+    ru.set_settings("voice_model", "Voice model: v3_1_ru", tmp_path)
+    ru.text_to_speech("Привет.")
+    assert len(loaded) == 3
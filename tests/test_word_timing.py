@@ -0,0 +1,28 @@
+from src.core.word_timing import estimate_word_timings
+
+
+def test_words_share_the_audio_by_their_length():
+    sentence = "A longer sentence, with 42 words."
+    timings = estimate_word_timings(sentence, 10000)
+
+    words = [sentence[slice(*timings.span(i))] for i in range(len(timings))]
+    assert words == ["A", "longer", "sentence,", "with", "42", "words."]
+    assert timings.times[0] == 0
+    assert all(a < b < 10000 for a, b in zip(timings.times, timings.times[1:]))
+    # "42" is spoken as "forty-two".
+    assert timings.times[5] - timings.times[4] > timings.times[4] - timings.times[3]
+
+
+def test_word_at():
+    timings = estimate_word_timings("One two three", 1300)
+
+    assert timings.word_at(0) == 0
+    assert timings.word_at(timings.times[1]) == 1
+    assert timings.word_at(1299) == 2
+
+
+def test_sentence_without_words():
+    timings = estimate_word_timings("   ", 100)
+
+    assert len(timings) == 0
+    assert timings.word_at(50) == -1